@@ -12,10 +12,16 @@ import PIL.Image
 if not hasattr(PIL.Image, 'ANTIALIAS'):
     PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
 
-from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip, TextClip, CompositeVideoClip, CompositeAudioClip
+from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip, TextClip, CompositeVideoClip
 from moviepy.video.fx.all import crop
 from moviepy.config import change_settings
 
+# Shared audio helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from music_bank import MusicBank
+from audio_bus import AudioBus
+from loudness import MUSIC_LUFS
+
 # 🛠️ YOUR IMAGEMAGICK PATH
 YOUR_MAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 if os.path.exists(YOUR_MAGICK_PATH):
@@ -34,6 +40,8 @@ def run_production(json_file):
     video_path = os.path.abspath(video_name)
     assets_dir = os.path.abspath('temp_assets')
     bgm_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "High Noon - The Grey Room _ Density & Time.mp3")
+    # Decoded and levelled once; every scene gets a slice instead of re-opening the file
+    music = MusicBank(os.path.dirname(bgm_file), default=os.path.basename(bgm_file))
 
     if os.path.exists(assets_dir): shutil.rmtree(assets_dir)
     os.makedirs(assets_dir, exist_ok=True)
@@ -57,15 +65,9 @@ def run_production(json_file):
         voice_audio = AudioFileClip(audio_path)
 
         # 🎵 --- 🚀 BGM MIXING LOGIC ---
-        if os.path.exists(bgm_file):
-            bg_music = AudioFileClip(bgm_file).volumex(0.12) # 12% Volume for Music
-            # Ensure BGM isn't shorter than voice
-            if bg_music.duration < voice_audio.duration:
-                bg_music = bg_music.loop(duration=voice_audio.duration)
-            else:
-                bg_music = bg_music.subclip(0, voice_audio.duration)
-            
-            final_audio = CompositeAudioClip([voice_audio.volumex(1.0), bg_music])
+        bg_music = music.bed(duration=voice_audio.duration, lufs=MUSIC_LUFS)  # looped if shorter than the voice
+        if bg_music is not None:
+            final_audio = AudioBus().add(voice_audio).add(bg_music).to_clip(voice_audio.duration)
         else:
             print("⚠️ No 'bgm.mp3' found. Using voice only.")
             final_audio = voice_audio
@@ -1,10 +1,14 @@
-import os, json, shutil, requests
+import os, sys, json, shutil, requests
 from gtts import gTTS
 from moviepy.editor import *
 import moviepy.video.fx.all as vfx
 from moviepy.config import change_settings
 from icrawler.builtin import BingImageCrawler
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
+
 # YouTube API Imports
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
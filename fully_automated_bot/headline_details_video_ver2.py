@@ -1,13 +1,18 @@
-import os, json, shutil, requests
+import os, sys, json
 import numpy as np
 from datetime import datetime
 from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
-from icrawler.builtin import BingImageCrawler
 import video_effects as fx 
 from dotenv import load_dotenv
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
+from image_cache import fetch_images
+from image_providers import provider_chain
+
 # Load API keys from .env file
 load_dotenv()
 
@@ -15,7 +20,9 @@ load_dotenv()
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
 
-PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
+# Background search order, each provider with a deadline (seconds) so a slow API cannot stall the
+# render. Pexels needs PEXELS_API_KEY in .env, local needs IMAGE_CORPUS_DIR; missing ones are skipped.
+BACKGROUND_PROVIDERS = os.getenv("IMAGE_PROVIDERS", "pexels:15,bing:45,local")
 
 try:
     # UPDATED: Ensure your stage3_upload can accept a custom filename
@@ -26,55 +33,12 @@ except ImportError:
 BGM_PATH = "bg_music.mp3"
 W, H = 1080, 1920
 
-def fetch_image_from_pexels(query, index):
-    """Fetches a high-quality image from Pexels API."""
-    if not PEXELS_API_KEY:
-        print("⚠️ Pexels API Key missing in .env. Skipping Pexels...")
-        return None
-        
-    url = f"https://api.pexels.com/v1/search?query={query}&per_page=1"
-    headers = {"Authorization": PEXELS_API_KEY}
-    
-    try:
-        response = requests.get(url, headers=headers).json()
-        if response.get('photos'):
-            img_url = response['photos'][0]['src']['large2x']
-            img_data = requests.get(img_url).content
-            save_path = f"temp_pexels_{index}.jpg"
-            with open(save_path, 'wb') as f:
-                f.write(img_data)
-            print(f"✅ Pexels image fetched for: {query}")
-            return save_path
-    except Exception as e:
-        print(f"❌ Pexels API Error: {e}")
-    return None
-
-def fetch_image_from_bing(query, index):
-    """Fallback: Uses Bing icrawler if Pexels fails."""
-    save_dir = f"temp_images_{index}"
-    if os.path.exists(save_dir): shutil.rmtree(save_dir)
-    os.makedirs(save_dir)
-    
-    print(f"🚀 Falling back to Bing for: {query}...")
-    try:
-        bing_crawler = BingImageCrawler(storage={'root_dir': save_dir}, log_level=50)
-        bing_crawler.crawl(keyword=query, max_num=1, filters={'size': 'large'})
-        files = os.listdir(save_dir)
-        if files: return os.path.join(save_dir, files[0])
-    except Exception as e:
-        print(f"⚠️ Bing Crawler failed: {e}")
-    return None
-
 def get_dynamic_background(item, index, voice_duration):
-    """Waterfall logic: Pexels -> Bing -> Local -> Placeholder."""
+    """Waterfall: image providers (Pexels -> Bing -> local corpus) -> temp_bg.jpg -> placeholder."""
     query = item.get('search_key', '').split('|')[0].strip()
-    image_path = fetch_image_from_pexels(query, index)
-    
-    if not image_path:
-        image_path = fetch_image_from_bing(query, index)
-        
-    if image_path:
-        return ImageClip(image_path).resize(height=H).set_duration(voice_duration)
+    paths = fetch_images(query, max_num=1, filters={'size': 'large'}, crawl=provider_chain(BACKGROUND_PROVIDERS))
+    if paths:
+        return ImageClip(paths[0]).resize(height=H).set_duration(voice_duration)
 
     bg_image = "temp_bg.jpg"
     if os.path.exists(bg_image):
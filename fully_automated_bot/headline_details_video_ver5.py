@@ -1,4 +1,4 @@
-import os, json, shutil, time
+import os, sys, json, shutil, time
 from datetime import datetime
 from gtts import gTTS
 from moviepy.editor import *
@@ -7,6 +7,11 @@ from PIL import Image
 from icrawler.builtin import BingImageCrawler
 import moviepy.video.fx.all as vfx
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
+from word_timing import word_timings, phrase_timings
+
 # --- CONFIGURATION ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
@@ -22,8 +27,8 @@ TICKER_H = 240
 
 # --- INTERNAL FUNCTIONS ---
 
-def create_synced_subtitles(full_text, duration):
-    """Syncs text segments based on character length relative to audio duration."""
+def create_synced_subtitles(full_text, duration, words=None):
+    """Syncs text segments to the voice's word timings (or by character length when there are none)."""
     sentences = [s.strip() for s in full_text.replace('!', '.').replace('?', '.').split('.') if len(s.strip()) > 5]
     total_chars = sum(len(s) for s in sentences)
     
@@ -35,15 +40,20 @@ def create_synced_subtitles(full_text, duration):
     prog_bar = VideoClip(make_progress_bar, duration=duration).set_position((0, H - TICKER_H))
 
     clips = [news_bar, prog_bar]
-    current_time = 0
+    if words:
+        spans = phrase_timings(words, sentences, duration)
+    else:
+        spans, current_time = [], 0
+        for s in sentences:
+            s_dur = (len(s) / total_chars) * duration
+            spans.append((current_time, current_time + s_dur))
+            current_time += s_dur
     
-    for s in sentences:
-        s_dur = (len(s) / total_chars) * duration
+    for s, (start, end) in zip(sentences, spans):
         txt = TextClip(s, fontsize=32, color='white', font='Arial-Bold', method='caption', 
                        size=(W-100, TICKER_H-60), align='center'
-                       ).set_start(current_time).set_duration(s_dur).set_position(('center', H - TICKER_H + 30))
+                       ).set_start(start).set_duration(end - start).set_position(('center', H - TICKER_H + 30))
         clips.append(txt)
-        current_time += s_dur
         
     return clips
 
@@ -102,7 +112,7 @@ def generate_video_and_upload(json_file):
             img_slideshow = ColorClip(size=(W-60, IMAGE_ZONE_H), color=(30,30,40)).set_duration(dur).set_position(('center', IMAGE_ZONE_Y))
 
         border = ColorClip(size=(W-40, IMAGE_ZONE_H+10), color=(0, 100, 255)).set_duration(dur).set_position(('center', IMAGE_ZONE_Y-5))
-        footer_layers = create_synced_subtitles(item['details'], dur)
+        footer_layers = create_synced_subtitles(item['details'], dur, word_timings(voice_file, tts_text))
 
         canvas = ColorClip(size=(W, H), color=(5, 5, 10)).set_duration(dur)
 
@@ -1,4 +1,4 @@
-import os, json, shutil, time
+import os, sys, json, shutil, time
 from datetime import datetime
 from gtts import gTTS
 from moviepy.editor import *
@@ -6,6 +6,10 @@ from moviepy.config import change_settings
 from PIL import Image
 from icrawler.builtin import BingImageCrawler
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
+
 # --- CONFIGURATION ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
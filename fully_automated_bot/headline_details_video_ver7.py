@@ -1,16 +1,21 @@
 import os
+import sys
 import json
 import logging
 import pickle
 import subprocess
 from datetime import datetime
-from moviepy.editor import ColorClip, TextClip, CompositeVideoClip, AudioFileClip, CompositeAudioClip
+from moviepy.editor import ColorClip, CompositeVideoClip, AudioFileClip, CompositeAudioClip
 from moviepy.config import change_settings
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
+
 # --- 🛠️ STEP 1: FIX IMAGEMAGICK PATH ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
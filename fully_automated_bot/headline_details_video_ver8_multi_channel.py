@@ -1,10 +1,12 @@
-import os, json, shutil, time
+import os, sys, json, time
 from datetime import datetime
-from gtts import gTTS
+from functools import partial
 from moviepy.editor import *
 from moviepy.config import change_settings
-from PIL import Image
-from icrawler.builtin import BingImageCrawler
+
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
 
 # 1. NEW: Import the upload module
 try:
@@ -13,6 +15,14 @@ except ImportError:
     print("⚠️ stage3_upload.py not found. Uploading will be disabled.")
 
 from visual_effects import get_styled_header, get_styled_ticker, get_progress_bar
+from segment_render import render_segmented, SEGMENT_MODE
+from render_backend import render_for_review
+from tts_cache import tts, synthesize_batch
+from audio_assets import load_audio
+from audio_bus import AudioBus
+from image_cache import fetch_images, prefetch_images
+from image_ingest import render_ready
+from loudness import VOICE_LUFS, MUSIC_LUFS
 
 # --- CONFIG ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
@@ -21,68 +31,73 @@ change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
 W, H = 720, 1280 
 BGM_PATH = "bg_music.mp3"
 
+def image_search(query):
+    return f"{query.split('|')[0].strip()} 2026 trending", 5
+
 def fetch_and_clean_images(query, index):
-    raw_dir, clean_dir = f"raw_{index}", f"clean_{index}"
-    for d in [raw_dir, clean_dir]:
-        if os.path.exists(d): shutil.rmtree(d)
-        os.makedirs(d)
-    main_term = query.split('|')[0].strip()
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    crawler.crawl(keyword=f"{main_term} 2026 trending", max_num=5)
+    search, count = image_search(query)
     valid_paths = []
-    for f in sorted(os.listdir(raw_dir)):
-        try:
-            with Image.open(os.path.join(raw_dir, f)) as img:
-                p = os.path.join(clean_dir, f"{f}.jpg")
-                img.convert('RGB').save(p, "JPEG")
-                valid_paths.append(p)
-        except: continue
+    # Crawl served from the shared image cache (only a new search_key hits Bing), each image
+    # decoded once into a 580px-tall RGB variant stored next to it
+    for raw_path in fetch_images(search, max_num=count):
+        try: valid_paths.append(render_ready(raw_path, (None, 580)))
+        except Exception: continue
     return valid_paths
 
+def voice_text(item):
+    return f"{item['hook_text']}. {item['headline']}. {item['details']}"
+
+def build_scene(i, item):
+    print(f"Rendering Scene {i+1}...")
+    voice_p = tts(voice_text(item), lang='en')
+    audio = load_audio(voice_p)
+    dur = audio.duration
+
+    header = get_styled_header(item['hook_text'], dur, W).set_position(('center', 60))
+    footer = get_styled_ticker(item['details'], dur, W, 300).set_position(('center', 920))
+    prog_bar = get_progress_bar(dur, W, H)
+
+    img_paths = fetch_and_clean_images(item.get('search_key', ''), i)
+    if img_paths:
+        slides = [ImageClip(p).set_duration(dur/len(img_paths)).resize(height=580) for p in img_paths]
+        slideshow = concatenate_videoclips(slides, method="compose").set_position(('center', 280))
+    else:
+        slideshow = ColorClip(size=(W-100, 580), color=(40, 40, 60)).set_duration(dur).set_position(('center', 280))
+
+    bg = ColorClip(size=(W, H), color=(0, 0, 15)).set_duration(dur)
+    return prog_bar.attach(CompositeVideoClip([bg, header, slideshow, footer])).set_audio(audio)
+
+def add_bgm(audio):
+    if not os.path.exists(BGM_PATH):
+        return audio
+    bus = AudioBus().add(audio, lufs=VOICE_LUFS).add(load_audio(BGM_PATH), lufs=MUSIC_LUFS, loop=True)
+    return bus.to_clip(audio.duration)
+
 def generate_video(json_file):
     with open(json_file, "r", encoding="utf-8") as f: items = json.load(f)
 
-    all_scenes = []
-    for i, item in enumerate(items):
-        print(f"Rendering Scene {i+1}...")
-        voice_p = f"v_{i}.mp3"
-        gTTS(text=f"{item['hook_text']}. {item['headline']}. {item['details']}", lang='en').save(voice_p)
-        audio = AudioFileClip(voice_p)
-        dur = audio.duration
-
-        header = get_styled_header(item['hook_text'], dur, W).set_position(('center', 60))
-        footer = get_styled_ticker(item['details'], dur, W, 300).set_position(('center', 920))
-        prog_bar = get_progress_bar(dur, W, H)
-
-        img_paths = fetch_and_clean_images(item.get('search_key', ''), i)
-        if img_paths:
-            slides = [ImageClip(p).set_duration(dur/len(img_paths)).resize(height=580) for p in img_paths]
-            slideshow = concatenate_videoclips(slides, method="compose").set_position(('center', 280))
-        else:
-            slideshow = ColorClip(size=(W-100, 580), color=(40, 40, 60)).set_duration(dur).set_position(('center', 280))
-
-        bg = ColorClip(size=(W, H), color=(0, 0, 15)).set_duration(dur)
-        scene = CompositeVideoClip([bg, header, slideshow, footer, prog_bar]).set_audio(audio)
-        all_scenes.append(scene)
-
-    final_v = concatenate_videoclips(all_scenes, method="compose")
-    cta = TextClip("Tune with us for more such news", fontsize=38, color='white', bg_color='darkred', size=(W, 100), method='caption'
-                   ).set_start(final_v.duration-3.5).set_duration(3.5).set_position(('center', H-250))
-    final_output = CompositeVideoClip([final_v, cta])
-    
-    if os.path.exists(BGM_PATH):
-        bgm = AudioFileClip(BGM_PATH).volumex(0.1).set_duration(final_output.duration)
-        final_output = final_output.set_audio(CompositeAudioClip([final_output.audio, bgm]))
-
+    cta_text = "Tune with us for more such news"
+    cta = TextClip(cta_text, fontsize=38, color='white', bg_color='darkred', size=(W, 100), method='caption'
+                   ).set_duration(3.5).set_position(('center', H-250))
     out_name = os.path.abspath(f"Viral_Short_{datetime.now().strftime('%M%S')}.mp4")
-    final_output.write_videofile(out_name, fps=24, codec="libx264")
-
-    # 2. NEW: ASK USER TO CONTINUE WITH UPLOAD
-    print("\n" + "="*30)
-    print(f"✅ Video Generated: {out_name}")
-    user_choice = input("🚀 Do you want to upload this to YouTube now? (y/n): ").lower()
-    
-    if user_choice == 'y':
+    synthesize_batch([voice_text(item) for item in items], lang='en')  # all voices at once, up front
+    prefetch_images([image_search(item.get('search_key', '')) for item in items])  # and all image searches
+
+    question = "🚀 Do you want to upload this to YouTube now? (y/n): "
+    if SEGMENT_MODE:
+        # One GOP-aligned segment per scene; only the segment(s) under the CTA carry it
+        scene_jobs = [(json.dumps(item, sort_keys=True), partial(build_scene, i, item)) for i, item in enumerate(items)]
+        render_segmented(scene_jobs, out_name, fps=24, tail_overlays=[cta], tail_key=cta_text, music=add_bgm)
+        print(f"\n✅ Video Generated: {out_name}")
+        approved = input(question).lower() == 'y'
+    else:
+        final_v = concatenate_videoclips([build_scene(i, item) for i, item in enumerate(items)], method="compose")
+        final_output = CompositeVideoClip([final_v, cta.set_start(final_v.duration-3.5)])
+        final_output = final_output.set_audio(add_bgm(final_output.audio))
+        # 2. NEW: ASK USER TO CONTINUE WITH UPLOAD (REVIEW_DRAFT=1 asks over a quick draft)
+        approved = render_for_review(final_output, out_name, question, fps=24, codec="libx264")
+
+    if approved:
         print("📤 Starting Upload Pipeline...")
         try:
             # Pass the JSON data and the absolute path of the new video
@@ -2,12 +2,20 @@ import os
 import json
 import shutil
 import subprocess
-from gtts import gTTS
+import sys
 from moviepy.editor import *
 import moviepy.video.fx.all as vfx
 from moviepy.config import change_settings
 from icrawler.builtin import BingImageCrawler
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from render_backend import write_video
+from tts_cache import tts, synthesize_batch
+from audio_assets import load_audio
+from audio_bus import AudioBus
+from loudness import MUSIC_LUFS
+
 # --- 1. CONFIGURATION ---
 IM_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IM_PATH})
@@ -43,14 +51,14 @@ def create_short(items):
     output_filename = "TrendWave_Short_Private.mp4"
 
     individual_scenes = []
-    
+    voice_text = lambda item: f"{item['type']} Update! {item['headline']} {item['details']}"
+    synthesize_batch([voice_text(item) for item in items], lang='en')  # all scenes' voices concurrently
+
     for i, item in enumerate(items):
-        # 1. Audio Generation per scene
-        text = f"{item['type']} Update! {item['headline']} {item['details']}"
-        tts = gTTS(text=text, lang='en')
-        tts_file = f"voice_{i}.mp3"
-        tts.save(tts_file)
-        voice = AudioFileClip(tts_file)
+        # 1. Audio Generation per scene (cache hit after the batch above)
+        text = voice_text(item)
+        tts_file = tts(text, lang='en')
+        voice = load_audio(tts_file)
 
         # 2. Visuals per scene
         bg_file = fetch_bg_image(item['search_key'], i)
@@ -79,12 +87,12 @@ def create_short(items):
     
     # Optional Background Music
     if os.path.exists("bg_music.mp3"):
-        bg_music = AudioFileClip("bg_music.mp3").volumex(0.15).set_duration(total_body_dur)
-        final_video.audio = CompositeAudioClip([final_video.audio, bg_music])
+        bus = AudioBus().add(final_video.audio).add(load_audio("bg_music.mp3"), lufs=MUSIC_LUFS, loop=True)
+        final_video.audio = bus.to_clip(total_body_dur)
 
     # 5. Apply 1.15x Speed & Render
     fast_video = final_video.fx(vfx.speedx, 1.15)
-    fast_video.write_videofile(output_filename, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
+    write_video(fast_video, output_filename, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
     
     # Cleanup
     fast_video.close()
@@ -1,15 +1,21 @@
-import os, json, shutil, asyncio, requests
-from edge_tts import Communicate
+import os, sys, json, asyncio
 from moviepy.editor import *
 import moviepy.video.fx.all as vfx
 from moviepy.config import change_settings
-from icrawler.builtin import BingImageCrawler
 
 # YouTube API Imports
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.http import MediaFileUpload
 
+# Shared TTS cache lives in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from tts_cache import tts, synthesize_batch
+from audio_assets import load_audio
+from audio_bus import AudioBus
+from loudness import MUSIC_LUFS
+from image_cache import fetch_images
+
 # --- 1. CONFIGURATION ---
 IM_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IM_PATH})
@@ -22,8 +28,8 @@ VOICES = {
 }
 
 async def generate_voice(text, filename, voice_type="anchor"):
-    communicate = Communicate(text, VOICES[voice_type], rate="+15%") # 1.15x speed at source
-    await communicate.save(filename)
+    # 1.15x speed at source; cached, so a re-run does not call edge_tts again
+    await asyncio.to_thread(tts, text, filename, engine="edge", voice=VOICES[voice_type], rate="+15%")
 
 def get_youtube_service():
     if not os.path.exists('client_secrets.json'):
@@ -34,14 +40,9 @@ def get_youtube_service():
     return build('youtube', 'v3', credentials=creds)
 
 def fetch_bg_image(query, index):
-    temp_dir = f"bg_{index}"
-    if os.path.exists(temp_dir): shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir)
-    try:
-        crawler = BingImageCrawler(storage={'root_dir': temp_dir})
-        crawler.crawl(keyword=query, max_num=1, filters=dict(size='large', layout='tall'))
-        for f in os.listdir(temp_dir): return os.path.join(temp_dir, f)
-    except: return None
+    # Cached, and answered by the next provider in IMAGE_PROVIDERS if Bing fails or stalls
+    files = fetch_images(query, max_num=1, filters=dict(size='large', layout='tall'))
+    return files[0] if files else None
 
 async def create_master_short(json_file, voice_mode="anchor"):
     if not os.path.exists(json_file): return None
@@ -50,13 +51,18 @@ async def create_master_short(json_file, voice_mode="anchor"):
     W, H = 1080, 1920
     scenes = []
     
-    bg_music = AudioFileClip("bg_music.mp3").volumex(0.12) if os.path.exists("bg_music.mp3") else None
+    bg_music = load_audio("bg_music.mp3") if os.path.exists("bg_music.mp3") else None
+
+    # All voices synthesized concurrently up front; generate_voice() below then hits the TTS cache
+    voice_text = lambda item: f"{item['headline']}. {item['details']}"
+    await asyncio.to_thread(synthesize_batch, [voice_text(item) for item in items],
+                            engine="edge", voice=VOICES[voice_mode], rate="+15%")
 
     for i, item in enumerate(items):
         # 1. Professional Voice Generation
         tts_file = f"voice_{i}.mp3"
-        await generate_voice(f"{item['headline']}. {item['details']}", tts_file, voice_mode)
-        voice = AudioFileClip(tts_file)
+        await generate_voice(voice_text(item), tts_file, voice_mode)
+        voice = load_audio(tts_file)
         dur = voice.duration
 
         # 2. Image Processing (No-Crop / Contain)
@@ -83,7 +89,8 @@ async def create_master_short(json_file, voice_mode="anchor"):
     # Progress Bar & Music
     total_dur = final_video.duration
     if bg_music:
-        final_video = final_video.set_audio(CompositeAudioClip([final_video.audio, bg_music.set_duration(total_dur)]))
+        bus = AudioBus().add(final_video.audio).add(bg_music, lufs=MUSIC_LUFS, loop=True)
+        final_video = final_video.set_audio(bus.to_clip(total_dur))
 
     def make_progress_bar(t): return ColorClip(size=(max(1, int((t/total_dur)*W)), 20), color=(255, 0, 0)).get_frame(t)
     prog_bar = VideoClip(make_progress_bar, duration=total_dur).set_position(('left', 'top'))
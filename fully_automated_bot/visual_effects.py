@@ -1,7 +1,12 @@
-import os
+import os, sys
 from moviepy.editor import *
 from PIL import Image, ImageDraw
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from progress_bar import ProgressBar
+from text_render import PillowTextClip as TextClip
+
 def create_rounded_box(w, h, color, radius=40, opacity=220):
     rect_img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
     draw = ImageDraw.Draw(rect_img)
@@ -27,14 +32,7 @@ def get_styled_ticker(text, dur, W, box_h):
     return CompositeVideoClip([bg, txt]).set_duration(dur)
 
 def get_progress_bar(dur, W, H):
-    """Creates a pulsing yellow progress bar for high engagement."""
-    base = ColorClip(size=(W, 12), color=(30, 30, 30)).set_duration(dur).set_opacity(0.6)
-    
-    def make_frame(t):
-        progress_w = max(1, int((t / dur) * W))
-        # Add a slight pulsing effect to the color for 'Glow'
-        pulse = 200 + int(55 * (t % 1)) 
-        return ColorClip(size=(progress_w, 12), color=(pulse, pulse, 0)).to_ImageClip().img
-    
-    bar = VideoClip(make_frame, duration=dur).set_position(('left', 'bottom'))
-    return CompositeVideoClip([base, bar]).set_position(('center', H-12))
\ No newline at end of file
+    """Creates a pulsing yellow progress bar for high engagement (draw with .attach(scene))."""
+    # 60% dark track underneath, bar colour pulses 200 -> 255 for the 'Glow'
+    return ProgressBar(dur, W, y=H-12, bar_h=12, color=(255, 255, 0),
+                       track_color=(30, 30, 30), track_opacity=0.6, pulse=True)
\ No newline at end of file
@@ -1,9 +1,11 @@
 import os, json, shutil, time
 from datetime import datetime
-from gtts import gTTS
 from moviepy.editor import *
+from text_render import PillowTextClip as TextClip
 from moviepy.config import change_settings
 from PIL import Image
+from audio_assets import load_audio, silence, concat_audio
+from tts_cache import tts
 
 # --- CONFIG ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
@@ -21,9 +23,11 @@ def generate_video(json_file):
         
         # Audio
         q_path, a_path = f"q_{i}.mp3", f"a_{i}.mp3"
-        gTTS(text=item['hook_text'], lang='en').save(q_path)
-        gTTS(text=item['details'], lang='en').save(a_path)
-        audio = concatenate_audioclips([AudioFileClip(q_path), AudioClip(lambda t: [0,0], duration=1.0), AudioFileClip(a_path)])
+        tts(item['hook_text'], q_path)
+        tts(item['details'], a_path)
+        # Sped up at the source (pitch kept), so the video is built at its final length
+        audio = concat_audio([load_audio(q_path, tempo=SPEED_FACTOR), silence(1.0 / SPEED_FACTOR),
+                              load_audio(a_path, tempo=SPEED_FACTOR)])
         dur = audio.duration
 
         # --- INSTA OPTIMIZED SUBTITLES ---
@@ -44,7 +48,6 @@ def generate_video(json_file):
 
         # Compile
         final_video = CompositeVideoClip([bg, header, subtitles, watermark]).set_audio(audio)
-        final_video = final_video.fx(vfx.speedx, SPEED_FACTOR)
 
         # Output for YouTube (Standard)
         yt_name = f"YT_Short_{i}.mp4"
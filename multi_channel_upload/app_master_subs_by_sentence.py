@@ -1,11 +1,11 @@
 import os, json, shutil, gc, time, random
 import tkinter as tk
 from tkinter import filedialog
-from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
 from PIL import Image
 from icrawler.builtin import BingImageCrawler
+from tts_cache import tts
 import spacy
 
 # Load spaCy NLP model for Entity Priority
@@ -91,7 +91,7 @@ def generate_video(json_path):
         # 1. Audio
         full_text = f"{item['hook_text']} {item['details']}"
         tts_path = f"audio_{i}.mp3"
-        gTTS(text=full_text, lang='en').save(tts_path)
+        tts(full_text, tts_path)  # cached: a re-run does not synthesize again
         audio = AudioFileClip(tts_path)
         dur = audio.duration
 
@@ -1,11 +1,15 @@
-import os, json, shutil, gc, time
+import os, json, gc, time
 import tkinter as tk
 from tkinter import filedialog
-from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
 from PIL import Image
-from icrawler.builtin import BingImageCrawler
+from ken_burns import ken_burns
+from audio_assets import load_audio
+from tts_cache import tts
+from word_timing import word_timings, phrase_timings
+from image_cache import fetch_images
+from image_ingest import render_ready
 
 # --- IMPORT UPLOAD LOGIC ---
 try: 
@@ -26,37 +30,29 @@ SUBTITLE_START_Y = 880
 GAP_HEIGHT = SUBTITLE_START_Y - HEADER_END_Y 
 
 def fetch_and_clean_images(query, index):
-    raw_dir, clean_dir = f"raw_{index}", f"clean_{index}"
-    for d in [raw_dir, clean_dir]:
-        if os.path.exists(d): shutil.rmtree(d)
-        os.makedirs(d)
-    
     # Use preference format: Vijay Jana Nayagan | Bobby Deol Jana Nayagan
+    # (crawled once per search, then served from the shared image cache)
     main_term = query.split('|')[0].strip()
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    crawler.crawl(keyword=f"{main_term} cinematic 4k", max_num=4)
+    raw_paths = fetch_images(f"{main_term} cinematic 4k", max_num=4)
     
     valid_paths = []
-    # FIX: Splitting extension to avoid .jpg.jpg bug
-    for i, f in enumerate(os.listdir(raw_dir)):
-        raw_path = os.path.join(raw_dir, f)
-        if not os.path.isfile(raw_path): continue
-        
+    # Header check only: each image is decoded once, at slide size, by apply_ken_burns
+    for raw_path in raw_paths:
+        f = os.path.basename(raw_path)
         try:
-            with Image.open(raw_path) as img:
-                # Get filename without extension
-                clean_name = f"image_{i}.jpg" 
-                p = os.path.join(clean_dir, clean_name)
-                img.convert('RGB').save(p, "JPEG")
-                valid_paths.append(p)
+            with Image.open(raw_path):
+                valid_paths.append(raw_path)
         except Exception as e:
             print(f"Skipping bad image {f}: {e}")
             
     return valid_paths
 
-def apply_ken_burns(clip):
-    """Cinematic slow zoom-in effect (100% to 110%)."""
-    return clip.fx(vfx.resize, lambda t: 1 + 0.04 * t) 
+def apply_ken_burns(image_path, duration):
+    """Cinematic slow zoom-in effect (100% to 110%) - image pre-scaled once, then cropped per frame."""
+    # Same box as resize(width=W).resize(height=GAP_HEIGHT): gap height, source aspect
+    zoom = 1.0 + 0.04 * duration
+    plate = render_ready(image_path, (None, GAP_HEIGHT), zoom=zoom)  # decoded once at the size the zoom needs
+    return ken_burns(plate, duration, size=(None, GAP_HEIGHT), zoom=(1.0, zoom))
 
 def generate_video(json_path):
     with open(json_path, "r", encoding="utf-8") as f: 
@@ -69,8 +65,9 @@ def generate_video(json_path):
         # 1. Audio Generation
         full_text = f"{item['hook_text']} {item['details']}"
         tts_path = f"audio_{i}.mp3"
-        gTTS(text=full_text, lang='en').save(tts_path)
-        audio = AudioFileClip(tts_path)
+        tts(full_text, tts_path)  # cached: a re-run does not synthesize again
+        # Sped up at the source (pitch kept), so every layer is built at the final length
+        audio = load_audio(tts_path, tempo=SPEED_FACTOR)
         dur = audio.duration
 
         # 2. UI Layers
@@ -89,25 +86,24 @@ def generate_video(json_path):
             slides = []
             for p in img_paths:
                 # Resize and zoom to fill the large visual gap
-                img_clip = ImageClip(p).set_duration(slide_dur).resize(width=W).resize(height=GAP_HEIGHT)
-                img_clip = apply_ken_burns(img_clip)
+                img_clip = apply_ken_burns(p, slide_dur)
                 slides.append(img_clip)
             slideshow = concatenate_videoclips(slides, method="compose").set_position(('center', HEADER_END_Y))
 
-        # 4. Sentence Subtitles
-        sent_dur = dur / 2
+        # 4. Sentence Subtitles (details appear when the voice reaches them)
+        (_, sent_dur), (d_start, d_end) = phrase_timings(word_timings(tts_path, full_text, tempo=SPEED_FACTOR),
+                                                         [item['hook_text'], item['details']], dur)
         s1 = TextClip(item['hook_text'].upper(), fontsize=36, color='white', method='caption', 
                       size=(W-100, None)).set_duration(sent_dur).set_position(('center', SUBTITLE_START_Y))
         s2 = TextClip(item['details'].upper(), fontsize=36, color='yellow', method='caption', 
-                      size=(W-100, None)).set_start(sent_dur).set_duration(sent_dur).set_position(('center', SUBTITLE_START_Y))
+                      size=(W-100, None)).set_start(d_start).set_duration(d_end - d_start).set_position(('center', SUBTITLE_START_Y))
 
         # 5. Last Scene CTA (Strict Constraint)
         cta = TextClip("Tune with us for more such news", fontsize=38, color='white', bg_color='darkred', 
                        size=(W, 100), method='caption').set_start(dur-3.5).set_duration(3.5).set_position(('center', H-150))
 
-        # 6. Assemble + Speed Optimization
+        # 6. Assemble (already at final speed)
         final = CompositeVideoClip([bg, header, banner, slideshow, s1, s2, cta]).set_audio(audio)
-        final = final.fx(vfx.speedx, SPEED_FACTOR)
 
         out_name = f"Short_{i+1}.mp4"
         final.write_videofile(out_name, fps=24, codec="libx264", threads=8, preset="ultrafast")
@@ -1,10 +1,10 @@
 import os, json, shutil, time
 from datetime import datetime
-from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
 from PIL import Image
 from icrawler.builtin import BingImageCrawler
+from tts_cache import tts
 
 # --- IMPORT UPLOAD SCRIPT ---
 try:
@@ -48,8 +48,8 @@ def generate_video(json_file):
         
         # Audio generation
         q_path, a_path = f"q_{i}.mp3", f"a_{i}.mp3"
-        gTTS(text=item['hook_text'], lang='en').save(q_path)
-        gTTS(text=item['details'], lang='en').save(a_path)
+        tts(item['hook_text'], q_path)
+        tts(item['details'], a_path)
         q_audio, a_audio = AudioFileClip(q_path), AudioFileClip(a_path)
         silence = AudioClip(lambda t: [0,0], duration=1.5, fps=44100)
         audio = concatenate_audioclips([q_audio, silence, a_audio])
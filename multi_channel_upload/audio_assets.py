@@ -0,0 +1,202 @@
+import os
+import hashlib
+import subprocess
+import wave
+import threading
+import numpy as np
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.config import get_setting
+
+from render_backend import AUDIO_FPS
+from tts_cache import TTSCache
+
+# --------------------------------------------------
+# DECODED PCM AUDIO CACHE
+# --------------------------------------------------
+# AudioFileClip starts an ffmpeg decoder every time a voice or music file is opened (per scene,
+# per worker). load_audio() decodes each source once into float32 stereo .npy at AUDIO_FPS;
+# every later open is a read-only memory map, shared through the OS page cache by all workers.
+#   set PCM_CACHE_DIR=D:\pcm_cache      set PCM_CACHE_MAX_MB=4000
+PCM_CACHE_DIR = os.environ.get("PCM_CACHE_DIR",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pcm_cache"))
+PCM_CACHE_MAX_MB = float(os.environ.get("PCM_CACHE_MAX_MB", "2000"))
+
+_cache = None
+_digests = {}   # (path, size, mtime) -> content hash
+_arrays = {}    # .npy path -> memory-mapped samples
+_zeros = np.zeros((0, 2), dtype=np.float32)
+_lock = threading.Lock()
+
+def get_pcm_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTSCache(PCM_CACHE_DIR, PCM_CACHE_MAX_MB)
+    return _cache
+
+def file_digest(path):
+    """Content hash, so copies of one TTS file (v_0.mp3, the cache entry) share one decode."""
+    st = os.stat(path)
+    memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _digests[memo] = h.hexdigest()
+    return _digests[memo]
+
+def atempo_filter(tempo):
+    """ffmpeg atempo chain for any factor (each stage is limited to 0.5..2.0 on older builds)."""
+    stages = []
+    while tempo > 2.0:
+        stages.append(2.0)
+        tempo /= 2.0
+    while tempo < 0.5:
+        stages.append(0.5)
+        tempo /= 0.5
+    stages.append(tempo)
+    return ",".join(f"atempo={s:.6g}" for s in stages)
+
+def decode_pcm(path, fps=AUDIO_FPS, tempo=1.0):
+    """float32 (n_samples, 2) array of the whole file, via one ffmpeg call (time-stretched if tempo != 1)."""
+    cmd = [get_setting("FFMPEG_BINARY"), "-v", "error", "-i", path]
+    if tempo != 1.0:
+        cmd += ["-af", atempo_filter(tempo)]
+    cmd += ["-f", "f32le", "-acodec", "pcm_f32le", "-ac", "2", "-ar", str(fps), "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg could not decode {path}: {proc.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.float32).reshape(-1, 2)
+
+def pcm_samples(path, fps=AUDIO_FPS, tempo=1.0, gain=1.0):
+    """Read-only memory map of the decoded samples (decoding only on a cache miss), `gain` pre-applied."""
+    def synth(_, tmp):
+        # Gained copies are scaled from the cached decode, never decoded again
+        samples = decode_pcm(path, fps, tempo) if gain == 1.0 else pcm_samples(path, fps, tempo) * np.float32(gain)
+        with open(tmp, "wb") as f:
+            np.save(f, samples)
+
+    rate = str(fps) if tempo == 1.0 else f"{fps}@{tempo:.6g}x"
+    if gain != 1.0:
+        rate += f"*{gain:.6g}"
+    npy = get_pcm_cache().get(file_digest(path), synth, engine="pcm", voice="", lang="", rate=rate, ext=".npy")
+    with _lock:
+        if npy not in _arrays:
+            _arrays[npy] = np.load(npy, mmap_mode="r")
+        return _arrays[npy]
+
+# --------------------------------------------------
+# CLIPS
+# --------------------------------------------------
+class PCMClip(AudioClip):
+    """
+    AudioClip over an in-memory sample array. Times map to sample indices directly: looping is
+    a modulo, trimming/offsets are index shifts, and past the end is silence (never a read error).
+    Contiguous chunks (how moviepy writes audio) come back as views of the array, not copies.
+    """
+
+    def __init__(self, samples, fps=AUDIO_FPS, duration=None, loop=False):
+        AudioClip.__init__(self)
+        self.samples = samples
+        self.fps = fps
+        self.nchannels = samples.shape[1]
+        self.loop = loop and len(samples) > 0
+        self.duration = self.end = duration if duration is not None else len(samples) / fps
+        self.make_frame = self._frame
+
+    def _frame(self, t):
+        n = len(self.samples)
+        if np.isscalar(t):
+            i = int(round(t * self.fps))
+            if self.loop:
+                i %= n
+            return self.samples[i] if 0 <= i < n else np.zeros(self.nchannels, dtype=np.float32)
+
+        idx = np.round(np.asarray(t) * self.fps).astype(np.int64)
+        if len(idx) == 0:
+            return np.zeros((0, self.nchannels), dtype=np.float32)
+        start = idx[0] % n if self.loop else idx[0]
+        if idx[-1] - idx[0] == len(idx) - 1 and 0 <= start and start + len(idx) <= n:
+            return self.samples[start:start + len(idx)]
+
+        if self.loop:
+            idx = idx % n
+        out = np.zeros((len(idx), self.nchannels), dtype=np.float32)
+        inside = (idx >= 0) & (idx < n)
+        out[inside] = self.samples[idx[inside]]
+        return out
+
+def load_audio(path, duration=None, loop=False, fps=AUDIO_FPS, tempo=1.0):
+    """
+    Drop-in for AudioFileClip(path) backed by the PCM cache. `duration` trims or pads with
+    silence; with loop=True the source repeats to fill it (music beds). `tempo` speeds the
+    speech up (or down) without changing its pitch; the stretched version is cached too, so
+    build the visuals at the resulting duration instead of applying speedx to the video.
+    """
+    clip = PCMClip(pcm_samples(path, fps, tempo), fps=fps, duration=duration, loop=loop)
+    clip.source = (path, fps, tempo)  # lets loudness.analyze() reuse its cached measurement
+    return clip
+
+def is_plain(clip, fps=AUDIO_FPS):
+    """True for an untransformed, non-looping PCMClip (volumex/subclip/fades replace make_frame)."""
+    return (isinstance(clip, PCMClip) and clip.fps == fps and not clip.loop
+            and getattr(clip.make_frame, "__func__", None) is PCMClip._frame)
+
+# --------------------------------------------------
+# 16-BIT WAV (what the encoders mux)
+# --------------------------------------------------
+def write_wav(samples, path, fps=AUDIO_FPS):
+    """Writes float samples in [-1, 1] as a 16-bit stereo WAV, no ffmpeg involved."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(pcm.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(fps)
+        w.writeframes(pcm.tobytes())
+    return path
+
+def read_wav(path):
+    """PCMClip of a 16-bit WAV written by write_wav (segment audio), no ffmpeg involved."""
+    with wave.open(path, "rb") as w:
+        fps, nchannels = w.getframerate(), w.getnchannels()
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").reshape(-1, nchannels)
+    samples = pcm.astype(np.float32) / 32767
+    if nchannels == 1:
+        samples = np.repeat(samples, 2, axis=1)
+    return PCMClip(samples, fps=fps)
+
+# --------------------------------------------------
+# SILENCE & CONCATENATION
+# --------------------------------------------------
+def silence(duration, fps=AUDIO_FPS):
+    """A pause backed by one shared, preallocated zero buffer (replaces AudioClip(lambda t: [0, 0]))."""
+    global _zeros
+    n = int(round(duration * fps))
+    with _lock:
+        if len(_zeros) < n:
+            _zeros = np.zeros((n, 2), dtype=np.float32)
+            _zeros.flags.writeable = False
+        return PCMClip(_zeros[:n], fps=fps)
+
+def clip_samples(clip, fps=AUDIO_FPS, chunksize=50000):
+    """The clip's samples as an (n, 2) array: the array itself for a plain PCMClip, else rendered once."""
+    n = int(round(clip.duration * fps))
+    if is_plain(clip, fps) and len(clip.samples) >= n:
+        return clip.samples[:n]
+    chunks = list(clip.iter_chunks(fps=fps, chunksize=chunksize))
+    samples = np.vstack(chunks).astype(np.float32) if chunks else np.zeros((0, 2), dtype=np.float32)
+    if samples.shape[1] == 1:
+        samples = np.repeat(samples, 2, axis=1)
+    if len(samples) < n:
+        samples = np.concatenate([samples, np.zeros((n - len(samples), 2), dtype=np.float32)])
+    return samples[:n]
+
+def concat_audio(clips, fps=AUDIO_FPS):
+    """
+    concatenate_audioclips for speech + gap + speech: joins the sample arrays once, so the
+    result is a single PCMClip instead of a per-chunk dispatch over the parts.
+    Parts from load_audio() last as long as their decoded samples. AudioFileClip used the
+    container duration, which counts the MP3 encoder padding, so each MP3 part is about
+    20-50 ms shorter than it was with AudioFileClip + concatenate_audioclips.
+    """
+    return PCMClip(np.concatenate([clip_samples(c, fps) for c in clips]), fps=fps)
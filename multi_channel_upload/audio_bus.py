@@ -0,0 +1,120 @@
+import numpy as np
+
+from render_backend import AUDIO_FPS
+from audio_assets import PCMClip, clip_samples, is_plain, write_wav
+from loudness import clip_loudness, gain_for
+
+# --------------------------------------------------
+# PRE-MIXED AUDIO BUS
+# --------------------------------------------------
+# CompositeAudioClip re-reads and re-mixes every source for each chunk the writer asks for.
+# The bus mixes all tracks once, with numpy, into one float32 stereo buffer at AUDIO_FPS:
+#   bus = AudioBus()
+#   bus.add(voice)
+#   bus.add(load_audio("bg.mp3"), lufs=-32, loop=True, fadein=1, duck=0.5)
+#   scene = scene.set_audio(bus.to_clip(dur))      # or bus.write("mix.wav")
+# The result is a plain PCMClip, so every writer streams views of that buffer and
+# premix_audio() dumps it straight to WAV.
+DUCK_THRESHOLD = 0.02   # peak level counted as "voice is speaking"
+DUCK_WINDOW = 0.01      # seconds per activity measurement
+DUCK_RAMP = 0.15        # seconds to fade the music down/up around speech
+
+class AudioBus:
+    """Tracks laid on one timeline and mixed once (volume, fades, looping, ducking)."""
+
+    def __init__(self, fps=AUDIO_FPS):
+        self.fps = fps
+        self.tracks = []
+        self._mix = None
+
+    def add(self, clip, start=0.0, volume=1.0, fadein=0.0, fadeout=0.0, duration=None, loop=False, duck=None,
+            lufs=None):
+        """
+        Lays `clip` at `start` seconds. `duration` trims or pads it; with loop=True it repeats to
+        fill `duration` (or the rest of the bus) like audio_loop. `duck` is the gain this track
+        drops to while any non-ducked track (the voice) is audible, e.g. 0.4 for music beds.
+        `lufs` levels the clip to that integrated loudness first (loudness.py; `volume` still applies).
+        """
+        if lufs is not None:
+            if getattr(clip, "source", None) is None and not is_plain(clip, self.fps):
+                # Composite or transformed clip: render it once, then measure and mix those samples
+                clip = PCMClip(clip_samples(clip, self.fps), fps=self.fps)
+            volume *= gain_for(clip_loudness(clip), lufs)
+        self.tracks.append(dict(clip=clip, start=start, volume=volume, fadein=fadein, fadeout=fadeout,
+                                duration=duration, loop=loop, duck=duck))
+        self._mix = None
+        return self
+
+    @property
+    def duration(self):
+        ends = [t["start"] + (t["duration"] if t["duration"] is not None else t["clip"].duration)
+                for t in self.tracks if not (t["loop"] and t["duration"] is None)]
+        return max(ends, default=0.0)
+
+    def _track_samples(self, track, n_total):
+        start = int(round(track["start"] * self.fps))
+        if track["duration"] is not None:
+            length = int(round(track["duration"] * self.fps))
+        elif track["loop"]:
+            length = n_total - start
+        else:
+            length = int(round(track["clip"].duration * self.fps))
+        length = max(0, min(length, n_total - start))
+
+        src = clip_samples(track["clip"], self.fps)
+        if track["loop"] and 0 < len(src) < length:
+            samples = src[np.arange(length) % len(src)]
+        else:
+            samples = np.zeros((length, 2), dtype=np.float32)
+            samples[:min(length, len(src))] = src[:length]
+
+        gain = np.full(length, track["volume"], dtype=np.float32)
+        fade_in = min(length, int(track["fadein"] * self.fps))
+        fade_out = min(length, int(track["fadeout"] * self.fps))
+        if fade_in:
+            gain[:fade_in] *= np.linspace(0, 1, fade_in, dtype=np.float32)
+        if fade_out:
+            gain[length - fade_out:] *= np.linspace(1, 0, fade_out, dtype=np.float32)
+        return start, samples * gain[:, None]
+
+    def _duck_gain(self, keys, duck):
+        """Per-sample gain: `duck` while the key tracks are audible, 1 elsewhere, with short ramps."""
+        n_total = len(keys)
+        win = max(1, int(DUCK_WINDOW * self.fps))
+        n_win = -(-n_total // win)
+        level = np.zeros(n_win * win, dtype=np.float32)
+        level[:n_total] = np.abs(keys).max(axis=1)
+        active = level.reshape(n_win, win).max(axis=1) > DUCK_THRESHOLD
+        gain = np.where(active, duck, 1.0)
+        ramp = max(1, int(DUCK_RAMP / DUCK_WINDOW))
+        gain = np.convolve(np.pad(gain, (ramp // 2, ramp - 1 - ramp // 2), mode="edge"),
+                           np.ones(ramp) / ramp, mode="valid")
+        return np.repeat(gain.astype(np.float32), win)[:n_total]
+
+    def mix(self, duration=None):
+        """The whole mix as one (n, 2) float32 buffer, clipped to [-1, 1]."""
+        n_total = int(round((duration if duration is not None else self.duration) * self.fps))
+        if self._mix is not None and len(self._mix) == n_total:
+            return self._mix
+        # Key tracks (voice) first: the ducked tracks follow their level
+        keys = np.zeros((n_total, 2), dtype=np.float32)
+        for track in self.tracks:
+            if track["duck"] is None:
+                start, samples = self._track_samples(track, n_total)
+                keys[start:start + len(samples)] += samples
+        out = keys.copy()
+        for track in self.tracks:
+            if track["duck"] is not None:
+                start, samples = self._track_samples(track, n_total)
+                gain = self._duck_gain(keys[start:start + len(samples)], track["duck"])
+                out[start:start + len(samples)] += samples * gain[:, None]
+        self._mix = np.clip(out, -1.0, 1.0)
+        return self._mix
+
+    def to_clip(self, duration=None):
+        """The mix as a PCMClip (set it as a clip's audio)."""
+        return PCMClip(self.mix(duration), fps=self.fps)
+
+    def write(self, path, duration=None):
+        """The mix as a 16-bit WAV for the encoder to mux."""
+        return write_wav(self.mix(duration), path, self.fps)
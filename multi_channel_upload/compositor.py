@@ -0,0 +1,180 @@
+import numpy as np
+from moviepy.editor import ImageClip, CompositeVideoClip
+
+# --------------------------------------------------
+# POSITION RESOLVING (same rules as moviepy's blit_on)
+# --------------------------------------------------
+SHORT_POSITIONS = {
+    'center': ['center', 'center'],
+    'left': ['left', 'center'],
+    'right': ['right', 'center'],
+    'top': ['center', 'top'],
+    'bottom': ['center', 'bottom'],
+}
+
+def resolve_position(clip, t, frame_size, img_size):
+    """Returns the integer (x, y) where `clip` lands on a frame of `frame_size` at clip time `t`."""
+    wf, hf = frame_size
+    wi, hi = img_size
+    pos = clip.pos(t)
+    pos = list(SHORT_POSITIONS[pos]) if isinstance(pos, str) else list(pos)
+
+    if clip.relative_pos:
+        for i, dim in enumerate([wf, hf]):
+            if not isinstance(pos[i], str):
+                pos[i] = dim * pos[i]
+
+    if isinstance(pos[0], str):
+        pos[0] = {'left': 0, 'center': (wf - wi) / 2, 'right': wf - wi}[pos[0]]
+    if isinstance(pos[1], str):
+        pos[1] = {'top': 0, 'center': (hf - hi) / 2, 'bottom': hf - hi}[pos[1]]
+    return int(pos[0]), int(pos[1])
+
+# --------------------------------------------------
+# STATIC LAYER DETECTION
+# --------------------------------------------------
+def _is_frozen_image(clip):
+    # ImageClip keeps its picture in .img and serves that exact array on every frame.
+    # Anything that went through .fl() (fadein, moving crops...) loses the ImageClip class.
+    return isinstance(clip, ImageClip) and clip.make_frame(0) is clip.img
+
+def is_static_layer(clip, duration, frame_size):
+    """True when the clip shows the same pixels at the same place for the whole scene."""
+    if not _is_frozen_image(clip):
+        return False
+    if clip.mask is not None and not _is_frozen_image(clip.mask):
+        return False
+    if clip.start > 0 or (clip.end is not None and clip.end < duration):
+        return False
+
+    img_size = clip.img.shape[:2][::-1]
+    samples = [resolve_position(clip, t, frame_size, img_size) for t in (0, duration / 2, duration)]
+    return samples.count(samples[0]) == len(samples)
+
+# --------------------------------------------------
+# PLATE BUILDER
+# --------------------------------------------------
+def _build_plate(layers, frame_size, duration):
+    """Pre-blends the layers (bottom to top) into one RGBA plate cropped to their union box."""
+    wf, hf = frame_size
+    placed = []
+    for clip in layers:
+        h, w = clip.img.shape[:2]
+        x, y = resolve_position(clip, 0, frame_size, (w, h))
+        placed.append((clip, x, y, w, h))
+
+    x0 = max(0, min(p[1] for p in placed))
+    y0 = max(0, min(p[2] for p in placed))
+    x1 = min(wf, max(p[1] + p[3] for p in placed))
+    y1 = min(hf, max(p[2] + p[4] for p in placed))
+    if x0 >= x1 or y0 >= y1:
+        return None
+
+    # Premultiplied 'over' accumulation, then un-premultiply for moviepy's straight-alpha blit
+    color = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.float32)
+    alpha = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+    for clip, x, y, w, h in placed:
+        cx0, cy0 = max(x, x0), max(y, y0)
+        cx1, cy1 = min(x + w, x1), min(y + h, y1)
+        if cx0 >= cx1 or cy0 >= cy1:
+            continue
+        src = (slice(cy0 - y, cy1 - y), slice(cx0 - x, cx1 - x))
+        dst = (slice(cy0 - y0, cy1 - y0), slice(cx0 - x0, cx1 - x0))
+
+        img = clip.img[src][:, :, :3].astype(np.float32)
+        a = clip.mask.img[src].astype(np.float32) if clip.mask is not None else np.ones(img.shape[:2], np.float32)
+        color[dst] = a[:, :, None] * img + (1.0 - a[:, :, None]) * color[dst]
+        alpha[dst] = a + (1.0 - a) * alpha[dst]
+
+    rgb = np.divide(color, alpha[:, :, None], out=np.zeros_like(color), where=alpha[:, :, None] > 0)
+    rgb = np.clip(np.rint(rgb), 0, 255).astype('uint8')
+
+    plate = ImageClip(rgb).set_mask(ImageClip(alpha.astype(np.float64), ismask=True))
+    names = [getattr(clip, 'layer_name', None) for clip in layers]
+    if any(names):
+        plate.layer_name = "plate(" + "+".join(dict.fromkeys(n for n in names if n)) + ")"
+    return plate.set_position((x0, y0)).set_start(0).set_duration(duration)
+
+def flatten_static_layers(clips, size, duration):
+    """
+    Replaces every run of 2+ consecutive time-invariant layers with a single cached RGBA plate,
+    so the compositor blends it once per frame instead of once per layer. Layer order is kept.
+    """
+    flattened, run = [], []
+
+    def flush():
+        plate = _build_plate(run, size, duration) if len(run) > 1 else None
+        flattened.extend([plate] if plate is not None else run)
+        run.clear()
+
+    for i, clip in enumerate(clips):
+        # The bottom layer is blitted on the empty canvas anyway, leave it alone
+        if i > 0 and is_static_layer(clip, duration, size):
+            run.append(clip)
+            continue
+        flush()
+        flattened.append(clip)
+    flush()
+    return flattened
+
+# --------------------------------------------------
+# IN-PLACE COMPOSITING (uint8 frame buffer)
+# --------------------------------------------------
+def blend_into(buf, img, mask, x, y):
+    """Blends `img` (with optional float mask) onto the uint8 buffer at (x, y), in place."""
+    hb, wb = buf.shape[:2]
+    hi, wi = img.shape[:2]
+    x1, y1 = max(0, -x), max(0, -y)
+    xp1, yp1 = max(0, x), max(0, y)
+    xp2, yp2 = min(wb, x + wi), min(hb, y + hi)
+    if xp1 >= xp2 or yp1 >= yp2:
+        return
+    x2, y2 = x1 + (xp2 - xp1), y1 + (yp2 - yp1)
+
+    region = buf[yp1:yp2, xp1:xp2]
+    src = img[y1:y2, x1:x2, :3]
+    if mask is None:
+        np.copyto(region, src, casting='unsafe')
+        return
+    diff = src.astype(np.float32)
+    diff -= region
+    diff *= mask[y1:y2, x1:x2, None]
+    diff += region
+    np.copyto(region, diff, casting='unsafe')
+
+def _is_plain_composite(clip):
+    return isinstance(clip, CompositeVideoClip) and \
+        clip.make_frame.__qualname__ == 'CompositeVideoClip.__init__.<locals>.make_frame'
+
+def composite_into(buf, clip, t):
+    """Renders frame `t` of `clip` into the preallocated (H, W, 3) uint8 buffer."""
+    # In-place overlays (progress bar) wrap a clip but can draw straight into the buffer
+    overlay = getattr(clip, 'overlay_source', None)
+    if overlay is not None and overlay[2] is clip.make_frame:
+        source, drawer, _ = overlay
+        composite_into(buf, source, t)
+        drawer.draw(buf, t)
+        return buf
+
+    # Only a plain CompositeVideoClip can be unrolled; after .fl() (fades, speedx...) it keeps
+    # its class and .clips but draws through a wrapped make_frame, so fall back to get_frame.
+    if clip.ismask or not _is_plain_composite(clip):
+        frame = clip.get_frame(t)
+        np.copyto(buf, frame[:, :, :3], casting='unsafe')
+        return buf
+
+    if clip.created_bg:
+        buf[:] = clip.bg_color
+    else:
+        np.copyto(buf, clip.bg.get_frame(t)[:, :, :3], casting='unsafe')
+
+    for c in clip.playing_clips(t):
+        ct = t - c.start
+        img = c.get_frame(ct)
+        mask = c.mask.get_frame(ct) if c.mask is not None else None
+        if mask is not None and mask.shape[:2] != img.shape[:2]:
+            h, w = min(mask.shape[0], img.shape[0]), min(mask.shape[1], img.shape[1])
+            img, mask = img[:h, :w], mask[:h, :w]
+        x, y = resolve_position(c, ct, clip.size, img.shape[:2][::-1])
+        blend_into(buf, img, mask, x, y)
+    return buf
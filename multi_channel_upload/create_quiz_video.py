@@ -1,11 +1,14 @@
-import os, json, random, shutil
+import os, json, random
 from datetime import datetime
-from gtts import gTTS
 from moviepy.editor import *
+from text_render import PillowTextClip as TextClip
 from moviepy.config import change_settings
 from PIL import Image, ImageFilter
-from icrawler.builtin import BingImageCrawler
+from image_cache import fetch_images
 from visual_effects import get_styled_header, get_progress_bar
+from render_backend import write_video
+from tts_cache import tts, synthesize_batch
+from audio_assets import load_audio, silence, concat_audio
 
 # --- CONFIG ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
@@ -27,18 +30,12 @@ def get_static_answer_box(text, dur, W, box_h):
     return CompositeVideoClip([bg, txt.set_position('center')], size=(box_w, box_h)).set_duration(dur)
 
 def fetch_quiz_bg(query, index):
-    raw_dir = f"quiz_raw_{index}"
-    if os.path.exists(raw_dir): shutil.rmtree(raw_dir)
-    os.makedirs(raw_dir)
     search_term = query.split('|')[0].strip()
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    crawler.crawl(keyword=f"{search_term} 4k space background", max_num=1)
-    
-    files = os.listdir(raw_dir)
+    files = fetch_images(f"{search_term} 4k space background", max_num=1)
     if not files: return ColorClip(size=(W, H), color=(10, 15, 35))
     
     processed_path = f"quiz_bg_{index}.jpg"
-    with Image.open(os.path.join(raw_dir, files[0])) as img:
+    with Image.open(files[0]) as img:
         img = img.convert("RGB").resize((W, H), Image.Resampling.LANCZOS)
         img = img.filter(ImageFilter.GaussianBlur(radius=15))
         img.save(processed_path)
@@ -49,21 +46,22 @@ def generate_quiz_video(json_file):
     if not os.path.exists(json_file): return None
     with open(json_file, "r", encoding="utf-8") as f: items = json.load(f)
 
+    # Every question/answer line synthesized concurrently before the scene loop
+    synthesize_batch([t for item in items for t in (item['hook_text'], f"The answer is {item['details']}")], lang='en')
+
     all_scenes = []
     for i, item in enumerate(items):
         print(f"🎬 Processing: {item['headline']}")
         
         # 1. AUDIO (Strictly single generation)
-        q_path, a_path = f"q_{i}.mp3", f"a_{i}.mp3"
-        gTTS(text=item['hook_text'], lang='en').save(q_path)
+        q_path = tts(item['hook_text'], lang='en')
         # Note: We only say "The answer is" once
-        gTTS(text=f"The answer is {item['details']}", lang='en').save(a_path)
+        a_path = tts(f"The answer is {item['details']}", lang='en')
         
-        q_audio = AudioFileClip(q_path)
-        a_audio = AudioFileClip(a_path)
-        silence_gap = AudioClip(lambda t: [0, 0], duration=1.5, fps=44100)
-        
-        full_audio = concatenate_audioclips([q_audio, silence_gap, a_audio])
+        # Sped up at the source (pitch kept), so the scene is built at its final length
+        q_audio = load_audio(q_path, tempo=SPEED_FACTOR)
+        a_audio = load_audio(a_path, tempo=SPEED_FACTOR)
+        full_audio = concat_audio([q_audio, silence(1.5 / SPEED_FACTOR), a_audio])
         dur = full_audio.duration
 
         # 2. VISUALS
@@ -80,8 +78,8 @@ def generate_quiz_video(json_file):
         prog_bar = get_progress_bar(dur, W, H)
 
         # 3. ASSEMBLE
-        scene = CompositeVideoClip([bg, header, question_display, footer, prog_bar])
-        scene = scene.set_audio(full_audio).fx(vfx.speedx, SPEED_FACTOR)
+        scene = prog_bar.attach(CompositeVideoClip([bg, header, question_display, footer]))
+        scene = scene.set_audio(full_audio)
         all_scenes.append(scene)
 
     if not all_scenes: return None
@@ -94,8 +92,5 @@ def generate_quiz_video(json_file):
     
     final_video = CompositeVideoClip([final_v, cta])
     out_name = f"Quiz_{datetime.now().strftime('%M%S')}.mp4"
-    final_video.write_videofile(out_name, fps=24, codec="libx264")
-    
-    # Cleanup temp files
-    shutil.rmtree(f"quiz_raw_{i}", ignore_errors=True)
+    write_video(final_video, out_name, fps=24, codec="libx264")
     return out_name
\ No newline at end of file
@@ -1,10 +1,9 @@
-import os, json, shutil
+import os, json
+from functools import partial
 from datetime import datetime
-from gtts import gTTS
 from moviepy.editor import *
+from text_render import PillowTextClip as TextClip
 from moviepy.config import change_settings
-from PIL import Image
-from icrawler.builtin import BingImageCrawler
 
 try:
     from stage3_upload import upload_from_json
@@ -12,6 +11,16 @@ except ImportError:
     print("⚠️ stage3_upload.py not found. Uploading will be disabled.")
 
 from visual_effects import get_styled_header, get_styled_ticker, get_progress_bar
+from render_backend import render_for_review
+from render_profiler import RenderProfiler, label
+from segment_render import render_segmented, SEGMENT_MODE
+from ken_burns import ken_burns
+from tts_cache import tts, synthesize_batch, print_tts_stats
+from audio_assets import load_audio, silence, concat_audio
+from audio_bus import AudioBus
+from loudness import VOICE_LUFS, MUSIC_LUFS
+from image_cache import fetch_images, prefetch_images, seen_before, print_image_stats
+from image_ingest import render_ready
 
 
 # ---------------- CONFIG ----------------
@@ -20,29 +29,30 @@ change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
 
 W, H = 720, 1280
 BGM_PATH = "bg_music.mp3"
+# Narration engine (gtts / edge / local, see tts_engines.py); falls back to offline TTS on timeout
+TTS_SETTINGS = {"engine": "gtts", "lang": "en"}
+# Slides are 580px tall and zoom to 1.08x: images are ingested at exactly that size
+SLIDE_H, SLIDE_ZOOM = 580, 1.08
 
 
 # ---------------- IMAGE FETCH ----------------
-def fetch_and_clean_images(query, index):
-    raw_dir, clean_dir = f"raw_{index}", f"clean_{index}"
+def image_search(query):
+    """The Bing search for a scene's search_key (shared by the prefetch stage and the scene)."""
+    return f"{query.split('|')[0].strip()} 2026 trending", 5
 
-    for d in [raw_dir, clean_dir]:
-        if os.path.exists(d):
-            shutil.rmtree(d)
-        os.makedirs(d)
 
-    main_term = query.split('|')[0].strip()
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    crawler.crawl(keyword=f"{main_term} 2026 trending", max_num=5)
+def fetch_and_clean_images(query, index, seen=None):
+    # Crawled once per search (shared image cache), then decoded once into a slide-sized RGB
+    # variant next to the original; re-renders reuse both. Photos in `seen` (hashes of earlier
+    # scenes' slides) are skipped so the short never repeats a slide.
+    search, count = image_search(query)
+    raw_paths = fetch_images(search, max_num=count, seen=set(seen) if seen is not None else None)
 
     valid_paths = []
-    for f in sorted(os.listdir(raw_dir)):
+    for raw_path in raw_paths:
         try:
-            with Image.open(os.path.join(raw_dir, f)) as img:
-                p = os.path.join(clean_dir, f"{f}.jpg")
-                img.convert('RGB').save(p, "JPEG")
-                valid_paths.append(p)
-        except:
+            valid_paths.append(render_ready(raw_path, (None, SLIDE_H), zoom=SLIDE_ZOOM))
+        except Exception:
             continue
 
     return valid_paths
@@ -53,13 +63,8 @@ def get_cinematic_slide(image_path, duration):
     """
     Ken Burns zoom + slow vertical motion + fade in/out
     """
-    base = ImageClip(image_path).set_duration(duration)
-
-    # Resize properly for Shorts
-    base = base.resize(height=580)
-
-    # Slow cinematic zoom
-    zoomed = base.resize(lambda t: 1 + 0.08 * (t / duration))
+    # Slow cinematic zoom at Shorts height (580px), from one pre-scaled plate
+    zoomed = ken_burns(image_path, duration, size=(None, SLIDE_H), zoom=(1.0, SLIDE_ZOOM))
 
     # Slight vertical float
     moving = zoomed.set_position(
@@ -70,73 +75,98 @@ def get_cinematic_slide(image_path, duration):
 
 
 # ---------------- VIDEO GENERATOR ----------------
-def generate_video(json_file):
-    with open(json_file, "r", encoding="utf-8") as f:
-        items = json.load(f)
-
-    all_scenes = []
+def scene_texts(item):
+    """Question and answer narration of one scene."""
+    return f"{item['hook_text']}. {item['headline']}.", f"{item['details']}"
 
-    for i, item in enumerate(items):
-        print(f"🎬 Rendering Scene {i+1}...")
 
-        # ---- TTS GENERATION ----
-        q_text = f"{item['hook_text']}. {item['headline']}."
-        gTTS(text=q_text, lang='en').save(f"q_{i}.mp3")
-        q_audio = AudioFileClip(f"q_{i}.mp3")
+def build_scene(i, item, profiler=None, seen=None):
+    print(f"🎬 Rendering Scene {i+1}...")
 
-        a_text = f"{item['details']}"
-        gTTS(text=a_text, lang='en').save(f"a_{i}.mp3")
-        a_audio = AudioFileClip(f"a_{i}.mp3")
+    # ---- TTS (already synthesized by the batch stage -> cache hits) ----
+    q_text, a_text = scene_texts(item)
+    q_audio = load_audio(tts(q_text, **TTS_SETTINGS))
+    a_audio = load_audio(tts(a_text, **TTS_SETTINGS))
 
-        silence = AudioClip(lambda t: [0, 0], duration=1.5, fps=44100)
+    audio = concat_audio([q_audio, silence(1.5), a_audio])
+    audio = audio.audio_fadein(0.3)
 
-        audio = concatenate_audioclips([q_audio, silence, a_audio])
-        audio = audio.audio_fadein(0.3)
+    dur = audio.duration
 
-        dur = audio.duration
+    # ---- VISUAL ELEMENTS ----
+    header = get_styled_header(item['hook_text'], dur, W)\
+        .set_position(('center', 60))\
+        .fadein(0.4)
 
-        # ---- VISUAL ELEMENTS ----
-        header = get_styled_header(item['hook_text'], dur, W)\
-            .set_position(('center', 60))\
-            .fadein(0.4)
-
-        footer = get_styled_ticker(item['details'], dur, W, 300)\
-            .set_position(('center', 920))\
-            .fadein(0.5)
+    footer = get_styled_ticker(item['details'], dur, W, 300)\
+        .set_position(('center', 920))\
+        .fadein(0.5)
 
-        prog_bar = get_progress_bar(dur, W, H)
+    prog_bar = get_progress_bar(dur, W, H)
 
-        # ---- SLIDESHOW ----
-        img_paths = fetch_and_clean_images(item.get('search_key', ''), i)
+    # ---- SLIDESHOW ----
+    img_paths = fetch_and_clean_images(item.get('search_key', ''), i, seen)
 
-        if img_paths:
-            slide_duration = dur / len(img_paths)
-            slides = [
-                get_cinematic_slide(p, slide_duration)
-                for p in img_paths
-            ]
-            slideshow = concatenate_videoclips(slides, method="compose")
-        else:
-            slideshow = ColorClip(
-                size=(W-100, 580),
-                color=(40, 40, 60)
-            ).set_duration(dur).set_position(('center', 280))
+    if img_paths:
+        slide_duration = dur / len(img_paths)
+        slides = [
+            get_cinematic_slide(p, slide_duration)
+            for p in img_paths
+        ]
+        slideshow = concatenate_videoclips(slides, method="compose")
+    else:
+        slideshow = ColorClip(
+            size=(W-100, 580),
+            color=(40, 40, 60)
+        ).set_duration(dur).set_position(('center', 280))
+
+    # ---- BACKGROUND ----
+    bg = ColorClip(size=(W, H), color=(0, 0, 15)).set_duration(dur)
+
+    # ---- COMPOSE SCENE ----
+    label("background", bg); label("header", header)
+    label("slideshow", slideshow); label("ticker", footer)
+    scene = prog_bar.attach(CompositeVideoClip([
+        bg,
+        header,
+        slideshow,
+        footer
+    ])).set_audio(audio)
+    if profiler is not None:
+        profiler.track(scene, i + 1)
+
+    return scene.fadein(0.4).fadeout(0.4)
+
+
+def get_cta(cta_text):
+    """Animated CTA strip for the last 3.5s (start is set by the caller)."""
+    return TextClip(
+        cta_text,
+        fontsize=40,
+        color='white',
+        bg_color='darkred',
+        size=(W, 100),
+        method='caption'
+    ).set_duration(3.5)\
+        .set_position(lambda t: (
+            'center',
+            H - 250 + 40 * (1 - min(1, t/0.5))
+        ))\
+        .fadein(0.5)
 
-        # ---- BACKGROUND ----
-        bg = ColorClip(size=(W, H), color=(0, 0, 15)).set_duration(dur)
 
-        # ---- COMPOSE SCENE ----
-        scene = CompositeVideoClip([
-            bg,
-            header,
-            slideshow,
-            footer,
-            prog_bar
-        ]).set_audio(audio)
+def add_bgm(audio):
+    if not os.path.exists(BGM_PATH):
+        return audio
+    # Mixed once into one buffer; the writer streams it instead of re-mixing per chunk
+    bus = AudioBus().add(audio, lufs=VOICE_LUFS)
+    bus.add(load_audio(BGM_PATH), lufs=MUSIC_LUFS, fadein=1, loop=True)  # levelled from its cached measurement
+    return bus.to_clip(audio.duration)
 
-        scene = scene.fadein(0.4).fadeout(0.4)
 
-        all_scenes.append(scene)
+def compose_video(items, seen, cta_text, profiler=None):
+    """The whole video (scene audio, no music) from cached assets; also each worker's build function."""
+    all_scenes = [build_scene(i, item, profiler, seen[i]) for i, item in enumerate(items)]
 
     # ---- SCENE TRANSITIONS ----
     final_v = concatenate_videoclips(
@@ -146,70 +176,73 @@ def generate_video(json_file):
     )
 
     # ---- CTA (Animated) ----
-    cta_text = "Please Like & Subscribe For More Updates"
+    cta = get_cta(cta_text).set_start(final_v.duration - 3.5)
+    return CompositeVideoClip([final_v, cta])
 
-    cta = TextClip(
-        cta_text,
-        fontsize=40,
-        color='white',
-        bg_color='darkred',
-        size=(W, 100),
-        method='caption'
-    )
-
-    cta = cta.set_start(final_v.duration - 3.5)\
-        .set_duration(3.5)\
-        .set_position(lambda t: (
-            'center',
-            H - 250 + 40 * (1 - min(1, t/0.5))
-        ))\
-        .fadein(0.5)
-
-    final_output = CompositeVideoClip([final_v, cta])
-
-    # ---- BACKGROUND MUSIC ----
-    if os.path.exists(BGM_PATH):
-        bgm = AudioFileClip(BGM_PATH)\
-            .volumex(0.08)\
-            .set_duration(final_output.duration)\
-            .audio_fadein(1)
 
-        final_output = final_output.set_audio(
-            CompositeAudioClip([final_output.audio, bgm])
-        )
+# ---------------- MAIN GENERATOR ----------------
+def generate_video(json_file):
+    with open(json_file, "r", encoding="utf-8") as f:
+        items = json.load(f)
 
-    # ---- EXPORT ----
+    cta_text = "Please Like & Subscribe For More Updates"
+    question = "🚀 Upload to YouTube now? (y/n): "
+
+    # ---- TTS FOR THE WHOLE JOB, CONCURRENTLY, BEFORE RENDERING ----
+    synthesize_batch([t for item in items for t in scene_texts(item)], **TTS_SETTINGS)
+    # ---- IMAGES FOR THE WHOLE JOB, CONCURRENTLY (as long as the slowest search) ----
+    searches = [image_search(item.get('search_key', '')) for item in items]
+    prefetch_images(searches)
+    # Which photos each scene must skip because an earlier scene already shows them
+    seen = seen_before(searches)
     out_name = os.path.abspath(
         f"Viral_Short_{datetime.now().strftime('%M%S')}.mp4"
     )
 
-    final_output.write_videofile(
-        out_name,
-        fps=24,
-        codec="libx264",
-        audio_codec="aac",
-        preset="medium"
-    )
+    if SEGMENT_MODE:
+        # ---- ONE SEGMENT PER SCENE, STITCHED WITHOUT RE-ENCODE ----
+        # Scenes butt-join here (no -0.4s overlap): each segment must stand alone.
+        scene_jobs = [
+            (json.dumps(item, sort_keys=True), partial(build_scene, i, item, seen=seen[i]))
+            for i, item in enumerate(items)
+        ]
+        render_segmented(
+            scene_jobs,
+            out_name,
+            fps=24,
+            tail_overlays=[get_cta(cta_text)],
+            tail_key=cta_text,
+            music=add_bgm
+        )
+        print(f"\n✅ Video Generated: {out_name}")
+        approved = input(question).lower() == 'y'
+    else:
+        profiler = RenderProfiler(out_name)
+        final_output = compose_video(items, seen, cta_text, profiler)
+
+        # ---- BACKGROUND MUSIC ----
+        final_output = final_output.set_audio(add_bgm(final_output.audio))
+
+        # ---- EXPORT (REVIEW_DRAFT=1: quick draft first, full render after 'y') ----
+        approved = render_for_review(
+            final_output,
+            out_name,
+            question,
+            write=profiler.write,
+            build=partial(compose_video, items, seen, cta_text),  # RENDER_WORKERS on Windows
+            fps=24,
+            codec="libx264",
+            audio_codec="aac",
+            preset="medium"
+        )
 
-    # ---- CLEANUP ----
-    for f in os.listdir():
-        if f.endswith(".mp3") and (
-            f.startswith("q_") or
-            f.startswith("a_")
-        ):
-            try:
-                os.remove(f)
-            except:
-                pass
-
-    print(f"\n✅ Video Generated: {out_name}")
-
-    user_choice = input("🚀 Upload to YouTube now? (y/n): ").lower()
-    if user_choice == 'y':
+    print_tts_stats()
+    print_image_stats()
+
+    if approved:
         upload_from_json(json_file, video_file=out_name)
     else:
         print("⏭️ Upload skipped.")
 
-
 if __name__ == "__main__":
     generate_video("news_data.json")
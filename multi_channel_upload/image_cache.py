@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from image_providers import provider_chain, ProviderChain
+
+# --------------------------------------------------
+# PERSISTENT IMAGE CACHE
+# --------------------------------------------------
+# Every scene used to rmtree its folder and re-crawl Bing, even when the same search_key was
+# fetched minutes earlier for another channel or a re-render. fetch_images() keeps each crawl
+# in a shared folder keyed by (normalized query, filters, count) and only crawls on a miss:
+#   paths = fetch_images("virat kohli century", max_num=4)
+# Each entry is a directory of images plus manifest.json (files, source URLs, fetch time).
+# Entries older than IMAGE_CACHE_TTL_HOURS are re-crawled (news images go stale), and the least
+# recently used entries are evicted once the cache outgrows IMAGE_CACHE_MAX_MB.
+#   set IMAGE_CACHE_DIR=D:\image_cache      set IMAGE_CACHE_TTL_HOURS=72      set IMAGE_CACHE_MAX_MB=3000
+# The returned files are shared: copy or convert them into a scene folder, never edit in place.
+#
+# Bing returns the same photo for related queries. Every image gets a perceptual hash (dHash) at
+# ingest: near-duplicates inside one crawl are deleted, and a photo the cache already holds under
+# another query is kept once and referenced ("same_as" in the manifest), so it is never cleaned or
+# decoded twice. fetch_images(..., seen=set()) also skips images already shown earlier in a job.
+#   set PHASH_DISTANCE=6      (differing bits out of 64 that still count as the same photo)
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR",
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_cache"))
+IMAGE_CACHE_TTL_HOURS = float(os.environ.get("IMAGE_CACHE_TTL_HOURS", "24"))
+IMAGE_CACHE_MAX_MB = float(os.environ.get("IMAGE_CACHE_MAX_MB", "2000"))
+# Searches go to the provider chain in image_providers (IMAGE_PROVIDERS, per-provider deadlines);
+# entries are keyed by the chain too, so switching providers never serves another one's pictures.
+# Whole-job prefetch: crawls in flight at once      set IMAGE_WORKERS=8
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "8"))
+PHASH_DISTANCE = int(os.environ.get("PHASH_DISTANCE", "6"))
+MANIFEST = "manifest.json"
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
+def normalize_query(query):
+    """'  Virat  KOHLI ' -> 'virat kohli' (case and spacing never split the cache)."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+def query_key(query, filters=None, max_num=4, provider=None):
+    provider = provider or provider_chain().name
+    payload = json.dumps([provider, normalize_query(query), filters or {}, max_num], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def phash(path):
+    """64-bit difference hash as 16 hex digits (JPEGs are draft-decoded at 1/8 scale for it)."""
+    from PIL import Image
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))
+        px = list(img.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    bits = [px[r * 9 + c] > px[r * 9 + c + 1] for r in range(8) for c in range(8)]
+    return f"{sum(1 << i for i, b in enumerate(bits) if b):016x}"
+
+def hash_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+def _near(h, hashes, distance=None):
+    """The first hash in `hashes` within `distance` bits of `h`, else None."""
+    limit = PHASH_DISTANCE if distance is None else distance
+    return next((other for other in hashes if hash_distance(h, other) <= limit), None)
+
+class ImageCache:
+    """Query-keyed crawl results on disk, TTL-fresh, LRU-evicted (recency = manifest mtime)."""
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, ttl_hours=IMAGE_CACHE_TTL_HOURS, max_mb=IMAGE_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._index = None      # phash -> image path relative to cache_dir, built from the manifests
+        self.hash_of = {}       # absolute image path -> phash, for everything this process has served
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _item_path(self, entry, item):
+        if item.get("same_as"):
+            return os.path.join(self.cache_dir, item["same_as"])
+        return os.path.join(entry, item["file"])
+
+    def _paths(self, entry, manifest):
+        paths = []
+        for item in manifest["files"]:
+            path = self._item_path(entry, item)
+            if item.get("phash"):
+                self.hash_of[path] = item["phash"]
+            paths.append(path)
+        return paths
+
+    def _read(self, entry):
+        """The entry's manifest if it is complete and fresh, else None."""
+        try:
+            with open(os.path.join(entry, MANIFEST), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - manifest.get("fetched", 0) > self.ttl:
+            return None
+        if not all(os.path.exists(self._item_path(entry, item)) for item in manifest.get("files", [])):
+            return None
+        return manifest
+
+    def hash_index(self):
+        """phash -> stored image (relative path) for every image the cache holds, loaded once from the manifests."""
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                for root, _, names in os.walk(self.cache_dir):
+                    if MANIFEST not in names or ".part" in root:
+                        continue
+                    try:
+                        with open(os.path.join(root, MANIFEST), "r", encoding="utf-8") as f:
+                            items = json.load(f).get("files", [])
+                    except (OSError, ValueError):
+                        continue
+                    rel = os.path.relpath(root, self.cache_dir)
+                    for item in items:
+                        if item.get("phash") and not item.get("same_as"):
+                            self._index.setdefault(item["phash"], os.path.join(rel, item["file"]))
+            return self._index
+
+    def _dedupe(self, tmp, rel_entry, files, sources):
+        """Manifest items for a fresh crawl: repeats within it are dropped, photos held elsewhere referenced."""
+        index = self.hash_index()
+        hashed = []
+        for f in files:
+            try:
+                hashed.append((f, phash(os.path.join(tmp, f))))
+            except Exception:
+                os.remove(os.path.join(tmp, f))  # not a decodable image
+
+        # Only entries already swapped in (their files exist) are referenced: a crawl another
+        # thread is still writing may never land, and its paths must not be handed out
+        items, kept = [], []
+        with self._lock:
+            for f, h in hashed:
+                if _near(h, kept) is not None:
+                    os.remove(os.path.join(tmp, f))
+                    continue
+                kept.append(h)
+                item = {"file": f, "url": sources.get(f), "phash": h}
+                match = _near(h, index)
+                if match is not None and os.path.exists(os.path.join(self.cache_dir, index[match])):
+                    os.remove(os.path.join(tmp, f))
+                    item["same_as"] = index[match]
+                else:
+                    index[h] = os.path.join(rel_entry, f)
+                items.append(item)
+        return items
+
+    def get(self, query, max_num=4, filters=None, crawl=None, provider="custom"):
+        """
+        Paths of the cached images for this search, crawling only on a miss or a stale entry.
+        `crawl` is a ProviderChain (default: provider_chain()) or a single crawl function,
+        which then runs as provider `provider`.
+        """
+        if crawl is None:
+            crawl = provider_chain()
+        elif not isinstance(crawl, ProviderChain):
+            crawl = ProviderChain([(provider, crawl, None)])
+        key = query_key(query, filters, max_num, crawl.name)
+        entry = self.entry_dir(key)
+        # Same search from two threads: the second waits and then hits
+        with self._key_lock(key):
+            manifest = self._read(entry)
+            if manifest is not None:
+                os.utime(os.path.join(entry, MANIFEST))
+                # Entries whose photos this one reuses stay as recently used as it is
+                for item in manifest["files"]:
+                    if item.get("same_as"):
+                        try:
+                            os.utime(os.path.join(self.cache_dir, os.path.dirname(item["same_as"]), MANIFEST))
+                        except OSError:
+                            pass
+                with self._lock:
+                    self.hits += 1
+                return self._paths(entry, manifest)
+
+            tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.part"
+            if os.path.exists(tmp):
+                shutil.rmtree(tmp)
+            os.makedirs(tmp)
+            rel_entry = os.path.relpath(entry, self.cache_dir)
+            try:
+                answered, sources = crawl.fetch(query, tmp, max_num, filters)
+                files = sorted(f for f in os.listdir(tmp) if f.lower().endswith(IMAGE_EXTS))
+                items = self._dedupe(tmp, rel_entry, files, sources)
+                if not items:
+                    return []  # nothing found: not cached, the next run tries again
+                manifest = {"query": normalize_query(query), "filters": filters or {}, "provider": answered,
+                            "fetched": time.time(), "files": items}
+                with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, indent=1)
+                # Swap the finished crawl in (another process may have refreshed it meanwhile),
+                # under the lock so _dedupe never sees an entry half replaced
+                with self._lock:
+                    if os.path.exists(entry):
+                        shutil.rmtree(entry, ignore_errors=True)
+                    try:
+                        os.replace(tmp, entry)
+                    except OSError:
+                        if self._read(entry) is None:
+                            raise
+            finally:
+                if os.path.exists(tmp):
+                    shutil.rmtree(tmp, ignore_errors=True)
+            with self._lock:
+                self.misses += 1
+        self.evict()
+        return self._paths(entry, manifest)
+
+    def evict(self):
+        """Drops least-recently-used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for shard in os.listdir(self.cache_dir):
+                shard_dir = os.path.join(self.cache_dir, shard)
+                if not os.path.isdir(shard_dir):
+                    continue
+                for name in os.listdir(shard_dir):
+                    entry = os.path.join(shard_dir, name)
+                    if ".part" in name or not os.path.isdir(entry):
+                        continue
+                    try:
+                        used = os.path.getmtime(os.path.join(entry, MANIFEST))
+                        size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                    except OSError:
+                        continue
+                    entries.append((used, size, entry))
+            total = sum(e[1] for e in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(rate, 1)}
+
+_cache = None
+
+def get_image_cache():
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
+
+def fetch_images(query, max_num=4, filters=None, crawl=None, seen=None):
+    """
+    Cached image search: list of image paths (shared, read-only) for `query`. With a `seen` set
+    of hashes, photos already shown earlier in the job are left out (unless that leaves nothing)
+    and the hashes of the returned ones are added to it.
+    """
+    cache = get_image_cache()
+    paths = cache.get(query, max_num, filters, crawl)
+    if seen is None:
+        return paths
+    fresh = [p for p in paths if _near(image_hash(p), seen) is None]
+    fresh = fresh or paths
+    seen.update(image_hash(p) for p in fresh)
+    return fresh
+
+def image_hash(path):
+    """phash of a cached image (from its manifest), computed for files the cache has not seen."""
+    cache = get_image_cache()
+    if path not in cache.hash_of:
+        cache.hash_of[path] = phash(path)
+    return cache.hash_of[path]
+
+def seen_before(searches):
+    """
+    For each search of a job, in order, the hashes of the images the searches before it put on
+    screen. Pass them as fetch_images(..., seen=set(...)) and every scene gets photos no earlier
+    scene used, however (and in whatever order) the scenes are rendered.
+    """
+    seen, before = set(), []
+    for request in searches:
+        before.append(frozenset(seen))
+        query, max_num, filters = _search_args(request)
+        fetch_images(query, max_num, filters, seen=seen)
+    return before
+
+def print_image_stats():
+    s = get_image_cache().stats()
+    print(f"🖼️ Image cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']}% hit rate)")
+
+# --------------------------------------------------
+# WHOLE-JOB PREFETCH (before rendering starts)
+# --------------------------------------------------
+def _search_args(request):
+    """'query' or (query, max_num[, filters]) -> (query, max_num, filters)"""
+    if isinstance(request, str):
+        return request, 4, None
+    request = tuple(request)
+    return request[0], request[1] if len(request) > 1 else 4, request[2] if len(request) > 2 else None
+
+def prefetch_images(queries, max_workers=None, crawl=None):
+    """
+    Crawls every image search of a job concurrently and returns {query: paths}. Each entry is a
+    query string or a (query, max_num[, filters]) tuple, exactly as the scene will ask for it,
+    so the per-scene fetch_images() calls that follow are cache hits. The job takes about as
+    long as its slowest search; failed searches are left out and retried by those calls.
+    """
+    # One crawl per distinct search, however many scenes or channels share it
+    crawl = crawl or provider_chain()
+    unique = {}
+    for request in queries:
+        query, max_num, filters = _search_args(request)
+        if normalize_query(query):
+            unique.setdefault(query_key(query, filters, max_num, getattr(crawl, "name", None)), (query, max_num, filters))
+
+    ready = {}
+    with ThreadPoolExecutor(max_workers=max_workers or IMAGE_WORKERS) as pool:
+        futures = [(args[0], pool.submit(get_image_cache().get, *args, crawl=crawl)) for args in unique.values()]
+        for query, future in futures:
+            try:
+                ready[query] = future.result()
+            except Exception as e:
+                print(f"⚠️ Image search '{query}' failed, will retry per scene: {e}")
+    found = sum(1 for paths in ready.values() if paths)
+    print(f"🖼️ {found}/{len(unique)} image searches ready ({sum(len(p) for p in ready.values())} images)")
+    return ready
@@ -0,0 +1,57 @@
+import os
+import math
+import threading
+from PIL import Image, ImageOps
+
+# --------------------------------------------------
+# RENDER-READY IMAGE VARIANTS
+# --------------------------------------------------
+# Crawled photos are often 3000-6000 px wide. Re-encoding them as full-size JPEGs and then
+# ImageClip(p).resize(width=W) meant decoding every multi-megapixel original (again) inside
+# moviepy. render_ready() decodes each image once, with JPEG draft (DCT-domain) downscaling,
+# fixes EXIF orientation and mode, and stores a copy just big enough for the layout next to the
+# original:
+#   slide = ImageClip(render_ready(p, (W, None))).resize(width=W)
+#   plate = ken_burns(render_ready(p, (None, 580), zoom=1.08), dur, size=(None, 580), zoom=(1.0, 1.08))
+# Variants are named <original>.rr<w>x<h>z<zoom>.jpg, so every later render reuses them.
+QUALITY = 92
+
+def _target(src_w, src_h, size, zoom):
+    """Smallest (w, h) with the source aspect that covers `size` scaled by `zoom` (never upscaled)."""
+    w, h = size
+    scale = max((w * zoom / src_w) if w else 0, (h * zoom / src_h) if h else 0)
+    if scale <= 0 or scale >= 1:
+        return src_w, src_h
+    return max(1, math.ceil(src_w * scale)), max(1, math.ceil(src_h * scale))
+
+def variant_path(path, size, zoom=1.0):
+    w, h = size
+    return f"{path}.rr{w or 0}x{h or 0}z{zoom:g}.jpg"
+
+def render_ready(path, size, zoom=1.0):
+    """
+    Path of an RGB JPEG of `path` sized for a layout of `size` ((w, None), (None, h) or (w, h),
+    covered) with headroom for a Ken Burns `zoom`. Built on first use; raises on unreadable files.
+    """
+    zoom = math.ceil(max(1.0, zoom) * 20) / 20  # 0.05 steps: slide lengths share variants
+    out = variant_path(path, size, zoom)
+    if os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(path):
+        return out
+
+    with Image.open(path) as img:
+        # EXIF orientations 5-8 are rotated by 90 degrees: the layout applies to the turned image
+        turned = img.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+        src_w, src_h = (img.height, img.width) if turned else img.size
+        tw, th = _target(src_w, src_h, size, zoom)
+        # JPEG: decode straight at 1/2, 1/4 or 1/8 scale when that still covers the target
+        img.draft("RGB", (th, tw) if turned else (tw, th))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != (tw, th) and img.width > tw:
+            img = img.resize((tw, th), Image.LANCZOS)
+
+        tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.part"
+        img.save(tmp, "JPEG", quality=QUALITY)
+    os.replace(tmp, out)
+    return out
@@ -0,0 +1,270 @@
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import namedtuple
+
+# --------------------------------------------------
+# IMAGE PROVIDERS
+# --------------------------------------------------
+# Interchangeable image searches behind image_cache.fetch_images(). Every provider is a
+#   crawl(query, out_dir, max_num, filters) -> {filename: source url}
+# function that downloads into out_dir; `filters` are icrawler/Bing-style
+# ({"size": "large", "layout": "tall"}) and are translated per provider.
+#   bing     - Bing image search via icrawler (network)
+#   pexels   - Pexels API, needs PEXELS_API_KEY (network)
+#   pixabay  - Pixabay API, needs PIXABAY_API_KEY (network)
+#   local    - a folder of images on disk (IMAGE_CORPUS_DIR): offline runs, tests, benchmarks
+# A chain tries them in order until one returns images. Each provider gets a deadline, counted
+# from when the search gets one of the provider's slots (the wait for a slot is bounded by the
+# same deadline): a provider that hangs is abandoned (it finishes in the background, still
+# holding its slot) and the next one is asked.
+#   set IMAGE_PROVIDERS=pexels:10,bing:45,local      (name[:deadline seconds], in fallback order)
+#   set IMAGE_CORPUS_DIR=D:\stock_photos
+IMAGE_PROVIDERS = os.environ.get("IMAGE_PROVIDERS", "bing,pexels,pixabay,local")
+IMAGE_CORPUS_DIR = os.environ.get("IMAGE_CORPUS_DIR", "")
+HTTP_TIMEOUT = 10  # per API request / download
+# At most this many crawls in flight against one provider (Bing starts returning empty pages
+# to bursts)      set BING_CONCURRENCY=4
+PROVIDER_CONCURRENCY = {"bing": int(os.environ.get("BING_CONCURRENCY", "4"))}
+DEFAULT_CONCURRENCY = 8
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
+Provider = namedtuple("Provider", ["crawl", "deadline", "available"])
+
+_provider_slots = {}
+_slots_lock = threading.Lock()
+
+def provider_slot(provider):
+    """Semaphore bounding concurrent crawls against one provider (shared by every caller)."""
+    with _slots_lock:
+        if provider not in _provider_slots:
+            _provider_slots[provider] = threading.BoundedSemaphore(PROVIDER_CONCURRENCY.get(provider, DEFAULT_CONCURRENCY))
+        return _provider_slots[provider]
+
+# --------------------------------------------------
+# PROVIDERS
+# --------------------------------------------------
+def bing_crawl(query, out_dir, max_num, filters=None):
+    """Bing via icrawler. Returns {filename: source url} for what it downloaded."""
+    from icrawler.builtin import BingImageCrawler
+    kwargs = {}
+    try:
+        from icrawler import ImageDownloader
+
+        class RecordingDownloader(ImageDownloader):
+            """Remembers which URL each downloaded file came from (for the manifest)."""
+            sources = {}
+
+            def process_meta(self, task):
+                if task.get("success") and task.get("filename"):
+                    self.sources[task["filename"]] = task.get("file_url")
+
+        RecordingDownloader.sources = {}
+        kwargs["downloader_cls"] = RecordingDownloader
+    except ImportError:
+        RecordingDownloader = None
+
+    crawler = BingImageCrawler(storage={'root_dir': out_dir}, log_level=50, **kwargs)
+    crawler.crawl(keyword=query, max_num=max_num, **({"filters": filters} if filters else {}))
+    return dict(RecordingDownloader.sources) if RecordingDownloader else {}
+
+def _download(urls, out_dir):
+    """Saves [(image url, page url)] as 000000.jpg, 000001.jpg, ... -> {filename: page url}"""
+    import requests
+    sources = {}
+    for k, (url, page) in enumerate(urls):
+        name = f"{k:06d}.jpg"
+        try:
+            r = requests.get(url, timeout=HTTP_TIMEOUT)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️ Skipping image {url}: {e}")
+            continue
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(r.content)
+        sources[name] = page or url
+    return sources
+
+def pexels_crawl(query, out_dir, max_num, filters=None):
+    import requests
+    filters = filters or {}
+    params = {"query": query, "per_page": max_num}
+    orientation = {"tall": "portrait", "wide": "landscape", "square": "square"}.get(filters.get("layout"))
+    if orientation:
+        params["orientation"] = orientation
+    if filters.get("size") in ("large", "medium", "small"):
+        params["size"] = filters["size"]
+    r = requests.get("https://api.pexels.com/v1/search", params=params,
+                     headers={"Authorization": os.environ["PEXELS_API_KEY"]}, timeout=HTTP_TIMEOUT)
+    r.raise_for_status()
+    photos = r.json().get("photos", [])[:max_num]
+    return _download([(p["src"]["large2x"], p.get("url")) for p in photos], out_dir)
+
+def pixabay_crawl(query, out_dir, max_num, filters=None):
+    import requests
+    filters = filters or {}
+    params = {"key": os.environ["PIXABAY_API_KEY"], "q": query[:100], "image_type": "photo",
+              "per_page": min(max(max_num, 3), 200), "safesearch": "true"}
+    orientation = {"tall": "vertical", "wide": "horizontal"}.get(filters.get("layout"))
+    if orientation:
+        params["orientation"] = orientation
+    r = requests.get("https://pixabay.com/api/", params=params, timeout=HTTP_TIMEOUT)
+    r.raise_for_status()
+    hits = r.json().get("hits", [])[:max_num]
+    return _download([(h["largeImageURL"], h.get("pageURL")) for h in hits], out_dir)
+
+_corpus = {}
+_corpus_lock = threading.Lock()
+
+def _tokens(text):
+    return {t for t in re.split(r"[^a-z0-9]+", text.lower()) if len(t) > 2}
+
+def _corpus_files(root):
+    """[(path, tokens of its relative path)] for every image under root, scanned once per process."""
+    with _corpus_lock:
+        if root not in _corpus:
+            files = []
+            for folder, _, names in os.walk(root):
+                for name in sorted(names):
+                    if name.lower().endswith(IMAGE_EXTS):
+                        path = os.path.join(folder, name)
+                        files.append((path, _tokens(os.path.splitext(os.path.relpath(path, root))[0])))
+            _corpus[root] = sorted(files)
+        return _corpus[root]
+
+def local_crawl(query, out_dir, max_num, filters=None, root=None):
+    """
+    Images from a folder, best match first: files whose folder and file names share the most
+    words with the query. Queries matching nothing get a fixed, query-dependent pick from the
+    whole corpus (a stand-in for a real search), so the same query always gets the same images.
+    """
+    root = root or IMAGE_CORPUS_DIR
+    wanted = _tokens(query)
+
+    def rank(entry):
+        path, tokens = entry
+        tiebreak = hashlib.sha1(f"{query}\0{os.path.relpath(path, root)}".encode("utf-8")).hexdigest()
+        return -len(wanted & tokens), tiebreak
+
+    files = _corpus_files(root)
+    matching = [f for f in files if wanted & f[1]] or files
+    sources = {}
+    for k, (path, _) in enumerate(sorted(matching, key=rank)[:max_num]):
+        name = f"{k:06d}{os.path.splitext(path)[1].lower()}"
+        shutil.copyfile(path, os.path.join(out_dir, name))
+        sources[name] = "file:///" + os.path.abspath(path).replace(os.sep, "/").lstrip("/")
+    return sources
+
+PROVIDERS = {
+    "bing": Provider(bing_crawl, 45, lambda: True),
+    "pexels": Provider(pexels_crawl, 15, lambda: bool(os.environ.get("PEXELS_API_KEY"))),
+    "pixabay": Provider(pixabay_crawl, 15, lambda: bool(os.environ.get("PIXABAY_API_KEY"))),
+    "local": Provider(local_crawl, 10, lambda: os.path.isdir(IMAGE_CORPUS_DIR)),
+}
+
+# --------------------------------------------------
+# FALLBACK CHAIN
+# --------------------------------------------------
+def _crawl_with_deadline(name, crawl, query, out_dir, max_num, filters, deadline):
+    """
+    Runs one provider in a worker thread and returns its sources, or raises TimeoutError.
+    Waiting for a free provider slot and the crawl itself get `deadline` seconds each, so a
+    search queued behind others (whole-job prefetch) is not failed before it starts. The
+    provider downloads into a scratch folder so an abandoned crawl can never write into
+    out_dir later.
+    """
+    slot = provider_slot(name)
+    if not slot.acquire(timeout=deadline):
+        raise TimeoutError(f"no free {name} slot within {deadline:g}s")
+    scratch = tempfile.mkdtemp(prefix=f"img_{name}_")
+    state = {"done": False, "abandoned": False}
+    lock = threading.Lock()
+
+    def work():
+        try:
+            with lock:
+                cancelled = state["abandoned"]
+            if not cancelled:
+                state["sources"] = crawl(query, scratch, max_num, filters) or {}
+        except Exception as e:
+            state["error"] = e
+        finally:
+            slot.release()  # an abandoned crawl keeps its slot until it really stops
+            with lock:
+                state["done"] = True
+                if state["abandoned"]:
+                    shutil.rmtree(scratch, ignore_errors=True)
+
+    worker = threading.Thread(target=work, name=f"image-{name}", daemon=True)
+    try:
+        worker.start()
+    except Exception:
+        slot.release()
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+    worker.join(deadline)
+    with lock:
+        if not state["done"]:
+            state["abandoned"] = True
+            raise TimeoutError(f"no answer within {deadline:g}s")
+    try:
+        if "error" in state:
+            raise state["error"]
+        sources = {}
+        for f in os.listdir(scratch):
+            if f.lower().endswith(IMAGE_EXTS):
+                shutil.move(os.path.join(scratch, f), os.path.join(out_dir, f))
+                sources[f] = state["sources"].get(f)
+        return sources
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+class ProviderChain:
+    """
+    Providers tried in order, each under its own deadline (None: run inline, no limit).
+    Callable like a single provider, so it can be passed anywhere a `crawl` is expected.
+    """
+
+    def __init__(self, providers):
+        # [(name, crawl, deadline)]
+        self.providers = list(providers)
+        self.name = ">".join(name for name, _, _ in self.providers)
+
+    def fetch(self, query, out_dir, max_num, filters=None):
+        """(name of the provider that answered, {filename: source url}); (None, {}) if none did."""
+        for name, crawl, deadline in self.providers:
+            try:
+                if deadline is None:
+                    with provider_slot(name):
+                        sources = crawl(query, out_dir, max_num, filters) or {}
+                else:
+                    sources = _crawl_with_deadline(name, crawl, query, out_dir, max_num, filters, deadline)
+            except Exception as e:
+                print(f"⚠️ {name} image search failed for '{query}': {e}")
+                continue
+            if any(f.lower().endswith(IMAGE_EXTS) for f in os.listdir(out_dir)):
+                return name, sources
+        return None, {}
+
+    def __call__(self, query, out_dir, max_num, filters=None):
+        return self.fetch(query, out_dir, max_num, filters)[1]
+
+def provider_chain(spec=None):
+    """
+    ProviderChain from 'pexels:10,bing,local' (default: IMAGE_PROVIDERS). Unknown names are an
+    error; providers that are not set up (no API key, no corpus folder) are left out.
+    """
+    providers = []
+    for part in (spec or IMAGE_PROVIDERS).split(","):
+        name, _, deadline = part.strip().partition(":")
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown image provider '{name}' (known: {', '.join(PROVIDERS)})")
+        provider = PROVIDERS[name]
+        if provider.available():
+            providers.append((name, provider.crawl, float(deadline) if deadline else provider.deadline))
+    return ProviderChain(providers)
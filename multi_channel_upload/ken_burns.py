@@ -0,0 +1,95 @@
+import numpy as np
+from PIL import Image
+from moviepy.editor import ImageClip, VideoClip
+
+# --------------------------------------------------
+# KEN BURNS (pre-scaled source + sliding crop window)
+# --------------------------------------------------
+# Old look: clip.fx(vfx.resize, lambda t: 1 + 0.04 * t), i.e. a center-anchored zoom
+# that re-resampled the full image every frame. Here the source is scaled once to the
+# largest zoom, and each frame is a crop of that plate resampled once to the output size.
+ZOOM_RATE = 0.04
+
+CURVES = {
+    "linear": lambda u: u,
+    "ease_in": lambda u: u * u,
+    "ease_out": lambda u: 1 - (1 - u) * (1 - u),
+    "ease_in_out": lambda u: u * u * (3 - 2 * u),
+}
+
+def _load_source(source):
+    if isinstance(source, Image.Image):
+        return source.convert("RGB")
+    if isinstance(source, ImageClip):
+        source = source.img
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(source[:, :, :3].astype("uint8"))
+    with Image.open(source) as img:
+        return img.convert("RGB")
+
+def _output_size(src_w, src_h, size):
+    """Resolves (w, None) / (None, h) like moviepy's resize, keeping the source aspect."""
+    if size is None:
+        return src_w, src_h
+    w, h = size
+    if w is None:
+        return max(1, round(src_w * h / src_h)), h
+    if h is None:
+        return w, max(1, round(src_h * w / src_w))
+    return w, h
+
+def _cover_box(src_w, src_h, w, h):
+    """Largest centered box of the source with the output aspect ratio."""
+    if src_w * h > src_h * w:
+        crop_w = src_h * w / h
+        return ((src_w - crop_w) / 2, 0, (src_w + crop_w) / 2, src_h)
+    crop_h = src_w * h / w
+    return (0, (src_h - crop_h) / 2, src_w, (src_h + crop_h) / 2)
+
+def ken_burns(source, duration, size=None, zoom=None, pan=None, curve="linear", resample=Image.BILINEAR):
+    """
+    Returns a VideoClip of `size` zooming/panning over `source` (path, array, PIL image or ImageClip).
+
+    zoom  : (start, end) scale pair, or a callable t -> scale (>= 1).
+            Default matches the old resize lambda: 1 + 0.04 * t.
+    pan   : ((fx0, fy0), (fx1, fy1)) focus points as fractions of the image, start -> end.
+            Default keeps the zoom centered.
+    curve : easing name from CURVES (or a callable on 0..1) applied to tuple zoom and pan.
+    """
+    src = _load_source(source)
+    w, h = _output_size(src.width, src.height, size)
+    ease = CURVES[curve] if isinstance(curve, str) else curve
+
+    def progress(t):
+        return ease(min(1.0, max(0.0, t / duration))) if duration else 0.0
+
+    if zoom is None:
+        zoom = (1.0, 1.0 + ZOOM_RATE * duration)
+    if callable(zoom):
+        zoom_at = zoom
+        samples = np.linspace(0, duration, max(2, int(duration * 24) + 1))
+        z_max = max(zoom_at(t) for t in samples)
+    else:
+        z0, z1 = zoom
+        zoom_at = lambda t: z0 + (z1 - z0) * progress(t)
+        z_max = max(z0, z1)
+    z_max = max(1.0, z_max)
+
+    (fx0, fy0), (fx1, fy1) = pan if pan else ((0.5, 0.5), (0.5, 0.5))
+
+    # One-time resample: cover-crop to the output aspect, then scale to the maximum zoom
+    plate_w, plate_h = round(w * z_max), round(h * z_max)
+    plate = src.resize((plate_w, plate_h), Image.LANCZOS, box=_cover_box(src.width, src.height, w, h))
+
+    def make_frame(t):
+        z = max(1.0, zoom_at(t))
+        crop_w, crop_h = plate_w / z, plate_h / z
+        u = progress(t)
+        cx = (fx0 + (fx1 - fx0) * u) * plate_w
+        cy = (fy0 + (fy1 - fy0) * u) * plate_h
+        left = min(max(cx - crop_w / 2, 0), plate_w - crop_w)
+        top = min(max(cy - crop_h / 2, 0), plate_h - crop_h)
+        box = (left, top, left + crop_w, top + crop_h)
+        return np.asarray(plate.resize((w, h), resample, box=box))
+
+    return VideoClip(make_frame, duration=duration)
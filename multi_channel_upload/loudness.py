@@ -0,0 +1,108 @@
+import json
+import numpy as np
+
+from render_backend import AUDIO_FPS
+from audio_assets import get_pcm_cache, pcm_samples, file_digest, clip_samples
+
+# --------------------------------------------------
+# LOUDNESS ANALYSIS (ITU-R BS.1770 integrated loudness)
+# --------------------------------------------------
+# gTTS, edge_tts and the offline voices come out at different levels, and music tracks are
+# mastered anywhere from -8 to -20 LUFS, so fixed volumex() factors never sound the same twice.
+# Every voice and music file is measured once (from the decoded PCM the mix reads anyway) and the
+# result is stored next to it in the PCM cache; the mix then gains each track to its target:
+#   bus.add(voice, lufs=-16)                  # any clip from load_audio()
+#   MUSIC.bed(channel, dur, lufs=-32)
+# Targets per channel come from an "audio" config section, like the TTS settings:
+#   "loudness": {"Default": {"voice": -16, "music": -32}, "SpaceMindAI": {"music": -28}}
+VOICE_LUFS = -16.0     # spoken word on Shorts / mobile
+MUSIC_LUFS = -32.0     # bed under the voice (about what volumex(0.12) did to a mastered track)
+PEAK_CEILING = 0.89    # -1 dBFS: the gain never pushes a sample above this
+BLOCK = 0.4            # gating block (s)
+STEP = 0.1             # 75% block overlap
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+def _biquad_response(b, a, w):
+    z = np.exp(-1j * w)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+def k_weighting(n, fps):
+    """Frequency response of the K-weighting filter (high shelf + RLB high-pass) on rfft bins of n samples."""
+    w = 2 * np.pi * np.fft.rfftfreq(n, 1.0 / fps) / fps
+
+    # +4 dB high shelf above ~1.5 kHz (head diffraction)
+    A, w0 = 10 ** (4.0 / 40), 2 * np.pi * 1500.0 / fps
+    alpha, cos = np.sin(w0) / (2 * (1 / np.sqrt(2))), np.cos(w0)
+    shelf = _biquad_response(
+        [A * ((A + 1) + (A - 1) * cos + 2 * np.sqrt(A) * alpha), -2 * A * ((A - 1) + (A + 1) * cos),
+         A * ((A + 1) + (A - 1) * cos - 2 * np.sqrt(A) * alpha)],
+        [(A + 1) - (A - 1) * cos + 2 * np.sqrt(A) * alpha, 2 * ((A - 1) - (A + 1) * cos),
+         (A + 1) - (A - 1) * cos - 2 * np.sqrt(A) * alpha], w)
+
+    # High-pass at 38 Hz
+    w0 = 2 * np.pi * 38.0 / fps
+    alpha, cos = np.sin(w0) / (2 * 0.5), np.cos(w0)
+    highpass = _biquad_response([(1 + cos) / 2, -(1 + cos), (1 + cos) / 2], [1 + alpha, -2 * cos, 1 - alpha], w)
+    return shelf * highpass
+
+def measure(samples, fps=AUDIO_FPS):
+    """{"lufs": integrated loudness (None for silence), "peak": sample peak} of an (n, channels) array."""
+    x = np.asarray(samples, dtype=np.float32)
+    n = len(x)
+    peak = float(np.abs(x).max()) if n else 0.0
+    if n == 0 or peak == 0.0:
+        return {"lufs": None, "peak": peak}
+
+    # Filtered in the frequency domain: one FFT per channel instead of a per-sample IIR loop
+    y = np.fft.irfft(np.fft.rfft(x, axis=0) * k_weighting(n, fps)[:, None], n=n, axis=0)
+
+    # Mean square of every 400 ms block (100 ms apart) from one cumulative sum
+    block, step = min(n, int(BLOCK * fps)), int(STEP * fps)
+    energy = np.concatenate([[0.0], np.cumsum((y ** 2).sum(axis=1))])
+    starts = np.arange(0, n - block + 1, step)
+    power = (energy[starts + block] - energy[starts]) / block
+    with np.errstate(divide="ignore"):
+        loud = -0.691 + 10 * np.log10(power)
+
+    gated = power[loud > ABSOLUTE_GATE]
+    if len(gated) == 0:
+        return {"lufs": None, "peak": peak}
+    threshold = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE
+    gated = power[(loud > ABSOLUTE_GATE) & (loud > threshold)]
+    return {"lufs": round(float(-0.691 + 10 * np.log10(gated.mean())), 2), "peak": peak}
+
+def analyze(path, fps=AUDIO_FPS, tempo=1.0):
+    """measure() of an audio file, computed once per file content and kept in the PCM cache."""
+    def synth(_, tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(measure(pcm_samples(path, fps, tempo), fps), f)
+
+    rate = str(fps) if tempo == 1.0 else f"{fps}@{tempo:.6g}x"
+    stats = get_pcm_cache().get(file_digest(path), synth, engine="loudness", voice="", lang="", rate=rate, ext=".json")
+    with open(stats, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def clip_loudness(clip):
+    """Cached analysis for clips from load_audio(), a one-off measurement for anything else."""
+    source = getattr(clip, "source", None)
+    if source is not None:
+        return analyze(*source)
+    return measure(clip_samples(clip, AUDIO_FPS), AUDIO_FPS)
+
+def gain_for(stats, lufs, ceiling=PEAK_CEILING):
+    """Linear gain that brings `stats` to `lufs`, held back so the peak stays under `ceiling`."""
+    if stats.get("lufs") is None:
+        return 1.0
+    gain = 10 ** ((lufs - stats["lufs"]) / 20)
+    if stats["peak"] > 0:
+        gain = min(gain, ceiling / stats["peak"])
+    return gain
+
+def loudness_targets(audio_cfg, channel=None):
+    """{"voice": lufs, "music": lufs} for a channel from a config's "audio" section (see above)."""
+    targets = {"voice": VOICE_LUFS, "music": MUSIC_LUFS}
+    loudness_map = audio_cfg.get("loudness", {})
+    targets.update(loudness_map.get("Default", {}))
+    targets.update(loudness_map.get(channel, {}))
+    return targets
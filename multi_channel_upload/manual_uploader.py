@@ -1,11 +1,12 @@
 import os, json, shutil, gc, time
 import tkinter as tk
 from tkinter import filedialog
-from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
 from PIL import Image
 from icrawler.builtin import BingImageCrawler
+from ken_burns import ken_burns
+from tts_cache import tts
 
 # --- IMPORT UPLOAD LOGIC ---
 try: 
@@ -52,9 +53,10 @@ def fetch_and_clean_images(query, index):
             
     return valid_paths
 
-def apply_ken_burns(clip):
-    """Cinematic slow zoom effect (100% to 110%)."""
-    return clip.fx(vfx.resize, lambda t: 1 + 0.04 * t) 
+def apply_ken_burns(image_path, duration):
+    """Cinematic slow zoom effect (100% to 110%) - image pre-scaled once, then cropped per frame."""
+    # Same box as resize(width=W).resize(height=GAP_HEIGHT): gap height, source aspect
+    return ken_burns(image_path, duration, size=(None, GAP_HEIGHT), zoom=(1.0, 1.0 + 0.04 * duration))
 
 def generate_video(json_path):
     with open(json_path, "r", encoding="utf-8") as f: 
@@ -67,7 +69,7 @@ def generate_video(json_path):
         # 1. Audio
         full_text = f"{item['hook_text']} {item['details']}"
         tts_path = f"audio_{i}.mp3"
-        gTTS(text=full_text, lang='en').save(tts_path)
+        tts(full_text, tts_path)  # cached: a re-run does not synthesize again
         audio = AudioFileClip(tts_path)
         dur = audio.duration
 
@@ -87,8 +89,7 @@ def generate_video(json_path):
             slides = []
             for p in img_paths:
                 # Resize width to hit edges, then height to fill the gap
-                img_clip = ImageClip(p).set_duration(slide_dur).resize(width=W).resize(height=GAP_HEIGHT)
-                img_clip = apply_ken_burns(img_clip)
+                img_clip = apply_ken_burns(p, slide_dur)
                 slides.append(img_clip)
             slideshow = concatenate_videoclips(slides, method="compose").set_position(('center', HEADER_END_Y))
 
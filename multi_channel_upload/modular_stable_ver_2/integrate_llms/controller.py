@@ -5,7 +5,9 @@ from tkinter import filedialog
 import os
 import sys  # Added for path handling
 from datetime import datetime, timedelta
-from processor import generate_video_single
+from processor import generate_video_single, voice_text, voice_settings, image_search
+from tts_cache import synthesize_batch
+from image_cache import prefetch_images
 
 def run():
     print("\n" + "="*40 + "\n🚀 MULTI-CHANNEL CONTROLLER\n" + "="*40)
@@ -30,6 +32,15 @@ def run():
 
     print(f"📂 Loaded: {selected_json}")
     print(f"✅ Ready to process {len(items)} scenes.")
+
+    # All narration is synthesized concurrently up front; the render workers then hit the TTS cache
+    by_channel = {}
+    for item in items:
+        by_channel.setdefault(item.get('channel', item.get('type', 'default')), []).append(voice_text(item))
+    for scene_channel, texts in by_channel.items():
+        synthesize_batch(texts, **voice_settings(scene_channel))
+    # Same for every image search of the job: one concurrent crawl stage instead of one per render
+    prefetch_images([image_search(item) for item in items])
     
     # Auto-select parallel if triggered by Grok, otherwise ask
     if len(sys.argv) > 1:
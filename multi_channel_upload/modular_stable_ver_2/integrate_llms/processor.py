@@ -1,18 +1,30 @@
 import os
 import json
-import shutil
 import gc
 import re
-import numpy as np
-from gtts import gTTS
-from icrawler.builtin import BingImageCrawler
+import sys
 from moviepy.editor import (
-    TextClip, ImageClip, AudioFileClip, 
-    CompositeVideoClip, ColorClip, concatenate_videoclips,
-    VideoClip, CompositeAudioClip  # FIXED IMPORT
+    ImageClip,
+    CompositeVideoClip, ColorClip, concatenate_videoclips
 )
 from moviepy.config import change_settings
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from compositor import flatten_static_layers
+from render_profiler import RenderProfiler, label
+from progress_bar import ProgressBar
+from text_render import PillowTextClip as TextClip
+from tts_cache import tts
+from audio_assets import load_audio
+from audio_bus import AudioBus
+from music_bank import MusicBank
+from tts_engines import tts_settings
+from loudness import loudness_targets
+from image_cache import fetch_images as cached_images
+from image_ingest import render_ready
+from word_timing import word_timings, phrase_timings
+
 # --- 1. LOAD EXTERNAL VIDEO CONFIG ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_PATH = os.path.join(BASE_DIR, "video_config.json")
@@ -53,34 +65,54 @@ def split_into_phrases(text, max_chars=35):
             final_phrases.append(s.strip())
     return [p for p in final_phrases if p]
 
-def get_mood_music(channel_name, duration):
-    music_cfg = v_cfg.get('audio', {})
-    music_map = music_cfg.get('music_map', {})
-    track_name = music_map.get(channel_name, music_map.get("Default", "bg_default.mp3"))
-    target = os.path.join(MUSIC_DIR, track_name)
-    
-    if os.path.exists(target):
-        vol = music_cfg.get('music_volume', 0.12)
-        music = AudioFileClip(target).volumex(vol).set_duration(duration)
-        if music.duration < duration:
-            from moviepy.audio.fx.all import audio_loop
-            music = audio_loop(music, duration=duration)
-        return music
-    return None
+# Each channel's track is decoded once per host, levelled to its audio.loudness target
+_music_cfg = v_cfg.get('audio', {})
+MUSIC_BANK = MusicBank(MUSIC_DIR, _music_cfg.get('music_map', {}),
+                       default=_music_cfg.get('music_map', {}).get("Default", "bg_default.mp3"),
+                       volume=_music_cfg.get('music_volume', 0.12))
+# Older configs set a fixed audio.music_volume factor: it is honoured until audio.loudness is set
+LEGACY_MUSIC_VOLUME = 'music_volume' in _music_cfg and 'loudness' not in _music_cfg
+if LEGACY_MUSIC_VOLUME:
+    print(f"⚠️ video_config.json: audio.music_volume={_music_cfg['music_volume']} scales every track by a fixed "
+          "factor. Replace it with audio.loudness (e.g. {\"Default\": {\"music\": -32}}) to level them (see readme).")
+elif 'music_volume' in _music_cfg:
+    print("⚠️ video_config.json: audio.music_volume is ignored, audio.loudness sets the music level.")
 
-def fetch_images(item_data, index, channel_name):
-    raw_dir = os.path.join(BASE_DIR, f"temp_raw_{channel_name}_{index}")
-    if os.path.exists(raw_dir): shutil.rmtree(raw_dir)
-    os.makedirs(raw_dir)
-    
+def level_targets(channel_name):
+    """Voice/music LUFS for a channel from video_config.json's audio.loudness (see loudness.py)."""
+    return loudness_targets(_music_cfg, channel_name)
+
+def get_mood_music(channel_name, duration, bus):
+    """Lays the channel's music bed onto the scene's audio bus (audio.music_duck ducks it under the voice)."""
+    lufs = None if LEGACY_MUSIC_VOLUME else level_targets(channel_name)["music"]
+    bed = MUSIC_BANK.bed(channel_name, duration, lufs=lufs)
+    if bed is not None:
+        bus.add(bed, duck=_music_cfg.get('music_duck'))
+
+def image_search(item_data):
+    """(query, count) for one item's images (also used by the controller to prefetch them all up front)."""
     meta = item_data.get('metadata', {})
     search_query = meta.get('search_key', '').split('|')[0].strip()
     if not search_query: search_query = item_data.get('headline', 'news')
         
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    max_imgs = v_cfg.get('timing', {}).get('images_per_scene', 4)
-    crawler.crawl(keyword=search_query, max_num=max_imgs)
-    return [os.path.join(raw_dir, f) for f in os.listdir(raw_dir) if f.endswith(('.jpg', '.png', '.jpeg'))]
+    return search_query, v_cfg.get('timing', {}).get('images_per_scene', 4)
+
+def fetch_images(item_data, index, channel_name):
+    """Images for the story, crawled once and shared by every channel and re-render (image_cache.py)."""
+    search_query, count = image_search(item_data)
+    return [p for p in cached_images(search_query, max_num=count) if p.endswith(('.jpg', '.png', '.jpeg'))]
+
+def voice_settings(channel_name):
+    """TTS engine/voice for a channel from video_config.json's audio.tts_map (see tts_engines.py)."""
+    return tts_settings(v_cfg.get('audio', {}), channel_name)
+
+def voice_text(item):
+    """The narration for one item (also used by the controller to batch TTS up front)."""
+    intro_hook = item.get('hook_text') or ""
+    main_details = item.get('details') or item.get('content') or ""
+    sub_hook = item.get('subscribe_hook') or ""
+    full_text = f"{intro_hook} {main_details} {sub_hook if sub_hook.upper() != 'NONE' else ''}"
+    return " ".join(full_text.split()).strip()
 
 def generate_video_single(json_path, index, channel, scene_date):
     try:
@@ -95,26 +127,22 @@ def generate_video_single(json_path, index, channel, scene_date):
         
         # --- SCRIPT & AUDIO ---
         headline_text = item.get('headline') or "Trending Update"
-        intro_hook = item.get('hook_text') or ""
-        main_details = item.get('details') or item.get('content') or ""
-        sub_hook = item.get('subscribe_hook') or ""
-        
-        full_text = f"{intro_hook} {main_details} {sub_hook if sub_hook.upper() != 'NONE' else ''}"
-        full_text = " ".join(full_text.split()).strip()
+        full_text = voice_text(item)
 
-        tts_path = os.path.join(BASE_DIR, f"temp_vo_{scene_id}.mp3")
-        gTTS(text=full_text, lang=v_cfg.get('audio', {}).get('tts_lang', 'en')).save(tts_path)
-        voice = AudioFileClip(tts_path)
+        tts_path = tts(full_text, **voice_settings(channel_name))
+        voice = load_audio(tts_path)
         dur = voice.duration
         
-        bg_m = get_mood_music(channel_name, dur)
-        final_audio = CompositeAudioClip([voice, bg_m]) if bg_m else voice
+        # Voice + music mixed once into one buffer (not re-mixed per exported chunk)
+        bus = AudioBus().add(voice, lufs=level_targets(channel_name)["voice"])  # gTTS/edge voices land at one level
+        get_mood_music(channel_name, dur, bus)
+        final_audio = bus.to_clip(dur)
 
         # --- VISUALS ---
         img_paths = fetch_images(item, index, channel_name)
         if img_paths:
             time_per_img = dur / len(img_paths)
-            clips = [ImageClip(p).set_duration(time_per_img).resize(width=W) for p in img_paths]
+            clips = [ImageClip(render_ready(p, (W, None))).set_duration(time_per_img).resize(width=W) for p in img_paths]
             slideshow = concatenate_videoclips(clips, method="compose").set_position('center')
         else:
             fallback_bg = v_cfg.get('visuals', {}).get('bg_color_fallback', [30, 30, 30])
@@ -129,35 +157,34 @@ def generate_video_single(json_path, index, channel, scene_date):
         
         # --- SUBTITLES ---
         phrases = split_into_phrases(full_text)
-        phrase_dur = dur / len(phrases)
+        # Each phrase is on screen while it is spoken (word timings cached with the voice)
+        spans = phrase_timings(word_timings(tts_path, full_text), phrases, dur)
         sub_clips = []
-        for i, phrase in enumerate(phrases):
+        for phrase, (start, end) in zip(phrases, spans):
             p_clip = TextClip(phrase.upper(), fontsize=style.get('subtitle_font_size', 75), 
                               color=style.get('subtitle_color', 'white'), font='Arial-Bold',
                               stroke_color='black', stroke_width=2, method='caption', 
-                              size=(W-200, None)).set_start(i * phrase_dur).set_duration(phrase_dur).set_position(('center', 1400))
+                              size=(W-200, None)).set_start(start).set_duration(end - start).set_position(('center', 1400))
             sub_clips.append(p_clip)
 
         # --- PROGRESS BAR ---
-        def make_frame(t):
-            curr_w = max(2, int((t/dur) * W))
-            pb_h = style.get('progress_bar_height', 15)
-            frame = np.zeros((pb_h, W, 3), dtype="uint8")
-            frame[:, :curr_w] = style.get('progress_bar_color', [255, 230, 0])
-            return frame
-        prog_bar = VideoClip(make_frame, duration=dur).set_position((0, H - 160))
-
-        # --- ASSEMBLY ---
-        final_video = CompositeVideoClip([slideshow, head_bg, headline, *sub_clips, prog_bar], size=(W, H)).set_audio(final_audio)
+        prog_bar = ProgressBar(dur, W, y=H - 160, bar_h=style.get('progress_bar_height', 15),
+                               color=style.get('progress_bar_color', [255, 230, 0]))
+
+        # --- ASSEMBLY (static header layers are pre-blended into one plate) ---
+        label("slideshow", slideshow); label("header", head_bg, headline); label("subtitles", sub_clips)
+        layers = flatten_static_layers([slideshow, head_bg, headline, *sub_clips], (W, H), dur)
+        final_video = prog_bar.attach(CompositeVideoClip(layers, size=(W, H))).set_audio(final_audio)
         
         output_dir = os.path.join(BASE_DIR, "Ready_to_Upload")
         os.makedirs(output_dir, exist_ok=True)
         final_path = os.path.join(output_dir, f"Render_{scene_id}.mp4")
         
-        final_video.write_videofile(final_path, fps=FPS, codec="libx264", audio_codec="aac", logger=None)
+        profiler = RenderProfiler(final_path)
+        profiler.track(final_video, scene_id)
+        profiler.write(final_video, final_path, fps=FPS, codec="libx264", audio_codec="aac", logger=None)
         
         final_video.close(); voice.close(); gc.collect()
-        if os.path.exists(tts_path): os.remove(tts_path)
         return final_path
 
     except Exception as e:
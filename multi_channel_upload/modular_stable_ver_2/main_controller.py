@@ -4,7 +4,9 @@ import tkinter as tk
 from tkinter import filedialog
 import os
 from datetime import datetime, timedelta
-from processor import generate_video_single
+from processor import generate_video_single, voice_text, voice_settings, image_search
+from tts_cache import synthesize_batch
+from image_cache import prefetch_images
 
 import shutil
 
@@ -25,6 +27,16 @@ def run():
         items = json.load(f)
 
     print(f"✅ Ready to process {len(items)} scenes.")
+
+    # All narration is synthesized concurrently up front; the render workers then hit the TTS cache
+    by_channel = {}
+    for item in items:
+        by_channel.setdefault(item.get('channel', item.get('type', 'default')), []).append(voice_text(item))
+    for scene_channel, texts in by_channel.items():
+        synthesize_batch(texts, **voice_settings(scene_channel))
+    # Same for every image search of the job: one concurrent crawl stage instead of one per render
+    prefetch_images([image_search(item) for item in items])
+
     mode = input("🚀 Parallel Render? (y/n): ").lower()
     
     if mode == 'y':
@@ -1,18 +1,30 @@
 import os
 import json
-import shutil
 import gc
 import re
-import numpy as np
-from gtts import gTTS
-from icrawler.builtin import BingImageCrawler
+import sys
 from moviepy.editor import (
-    TextClip, ImageClip, AudioFileClip, 
-    CompositeVideoClip, ColorClip, concatenate_videoclips,
-    VideoClip 
+    ImageClip,
+    CompositeVideoClip, ColorClip, concatenate_videoclips
 )
 from moviepy.config import change_settings
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from compositor import flatten_static_layers
+from render_profiler import RenderProfiler, label
+from progress_bar import ProgressBar
+from text_render import PillowTextClip as TextClip
+from tts_cache import tts
+from audio_assets import load_audio
+from audio_bus import AudioBus
+from music_bank import MusicBank
+from tts_engines import tts_settings
+from loudness import loudness_targets
+from image_cache import fetch_images as cached_images
+from image_ingest import render_ready
+from word_timing import word_timings, phrase_timings
+
 # --- SYSTEM CONFIG ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
 change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_PATH})
@@ -41,32 +53,48 @@ def split_into_phrases(text, max_chars=35):
             final_phrases.append(s.strip())
     return [p for p in final_phrases if p]
 
-def get_mood_music(channel_name, duration):
-    bg_music_map = {
-        "trendwave_now": "bg_cricket.mp3",
-        "SpaceMindAI": "bg_space.mp3",
-        "ExamPulse": "bg_education.mp3",
-        "WonderFacts24_7": "bg_facts.mp3"
+# Each channel's track is decoded once per host, levelled to its loudness target
+MUSIC_BANK = MusicBank(MUSIC_DIR, {
+    "trendwave_now": "bg_cricket.mp3",
+    "SpaceMindAI": "bg_space.mp3",
+    "ExamPulse": "bg_education.mp3",
+    "WonderFacts24_7": "bg_facts.mp3"
+}, default="bg_default.mp3")
+
+def level_targets(channel_name):
+    """Voice and music loudness per channel in LUFS (measured once per file, see loudness.py)."""
+    loudness_map = {
+        "Default": {"voice": -16, "music": -32},
     }
-    track_name = bg_music_map.get(channel_name, "bg_default.mp3")
-    target = os.path.join(MUSIC_DIR, track_name)
-    if os.path.exists(target):
-        music = AudioFileClip(target).volumex(0.12).set_duration(duration)
-        if music.duration < duration:
-            from moviepy.audio.fx.all import audio_loop
-            music = audio_loop(music, duration=duration)
-        return music
-    return None
+    return loudness_targets({"loudness": loudness_map}, channel_name)
 
-def fetch_images(item_data, index, channel_name):
-    raw_dir = os.path.join(BASE_DIR, f"temp_raw_{channel_name}_{index}")
-    if os.path.exists(raw_dir): shutil.rmtree(raw_dir)
-    os.makedirs(raw_dir)
+def get_mood_music(channel_name, duration, bus):
+    """Lays the channel's music bed, looped to `duration`, onto the scene's audio bus."""
+    bed = MUSIC_BANK.bed(channel_name, duration, lufs=level_targets(channel_name)["music"])
+    if bed is not None:
+        bus.add(bed)
+
+def voice_settings(channel_name):
+    """TTS engine/voice per channel (remote engines fall back to the offline one on timeout)."""
+    tts_map = {
+        "Default": {"engine": "gtts"},
+    }
+    return tts_settings({"tts_lang": "en", "tts_map": tts_map}, channel_name)
+
+def image_search(item_data):
+    """(query, count) for one item's images (also used by the controller to prefetch them all up front)."""
     search_query = item_data['metadata'].get('search_key', '').split('|')[0].strip()
     if not search_query: search_query = item_data['headline']
-    crawler = BingImageCrawler(storage={'root_dir': raw_dir}, log_level=50)
-    crawler.crawl(keyword=search_query, max_num=4)
-    return [os.path.join(raw_dir, f) for f in os.listdir(raw_dir) if f.endswith(('.jpg', '.png', '.jpeg'))]
+    return search_query, 4
+
+def fetch_images(item_data, index, channel_name):
+    """Images for the story, crawled once and shared by every channel and re-render (image_cache.py)."""
+    search_query, count = image_search(item_data)
+    return [p for p in cached_images(search_query, max_num=count) if p.endswith(('.jpg', '.png', '.jpeg'))]
+
+def voice_text(item):
+    """The narration for one item (also used by the controller to batch TTS up front)."""
+    return f"{item['hook_text']} {item['details']}"
 
 # FIXED: Added scene_date to the arguments
 def generate_video_single(json_path, index, channel, scene_date):
@@ -81,20 +109,20 @@ def generate_video_single(json_path, index, channel, scene_date):
         output_filename = f"Render_{scene_id}.mp4"
 
         # 1. AUDIO
-        full_text = f"{item['hook_text']} {item['details']}"
-        tts_path = os.path.join(BASE_DIR, f"temp_vo_{scene_id}.mp3")
-        gTTS(text=full_text, lang='en').save(tts_path)
-        voice = AudioFileClip(tts_path)
+        full_text = voice_text(item)
+        tts_path = tts(full_text, **voice_settings(channel_name))  # shared cache: other channels reuse this voice
+        voice = load_audio(tts_path)
         dur = voice.duration
-        bg_music = get_mood_music(channel_name, dur)
-        from moviepy.audio.AudioClip import CompositeAudioClip
-        final_audio = CompositeAudioClip([voice, bg_music]) if bg_music else voice
+        # Voice + music mixed once into one buffer (not re-mixed per exported chunk)
+        bus = AudioBus().add(voice, lufs=level_targets(channel_name)["voice"])  # gTTS/edge voices land at one level
+        get_mood_music(channel_name, dur, bus)
+        final_audio = bus.to_clip(dur)
 
         # 2. VISUALS
         img_paths = fetch_images(item, index, channel_name)
         if img_paths:
             time_per_img = dur / len(img_paths)
-            clips = [ImageClip(p).set_duration(time_per_img).resize(width=W) for p in img_paths]
+            clips = [ImageClip(render_ready(p, (W, None))).set_duration(time_per_img).resize(width=W) for p in img_paths]
             slideshow = concatenate_videoclips(clips, method="compose").set_position('center')
         else:
             slideshow = ColorClip(size=(W, H), color=(30,30,30)).set_duration(dur)
@@ -108,27 +136,26 @@ def generate_video_single(json_path, index, channel, scene_date):
 
         # 4. SENTENCE-BASED SUBTITLES
         phrases = split_into_phrases(full_text)
-        phrase_dur = dur / len(phrases)
+        # Each phrase is on screen while it is spoken (word timings cached with the voice)
+        spans = phrase_timings(word_timings(tts_path, full_text), phrases, dur)
         sub_clips = []
-        for i, phrase in enumerate(phrases):
+        for phrase, (start, end) in zip(phrases, spans):
             p_clip = TextClip(phrase.upper(), fontsize=75, color='white', font='Arial-Bold',
-                              stroke_color='black', stroke_width=2, method='caption', size=(W-200, None)).set_start(i * phrase_dur).set_duration(phrase_dur).set_position(('center', 1400))
+                              stroke_color='black', stroke_width=2, method='caption', size=(W-200, None)).set_start(start).set_duration(end - start).set_position(('center', 1400))
             sub_clips.append(p_clip)
 
         # 5. PROGRESS BAR
-        def make_frame(t):
-            curr_w = max(2, int((t/dur) * W))
-            frame = np.zeros((15, W, 3), dtype="uint8")
-            frame[:, :curr_w] = [255, 230, 0] 
-            return frame
-        prog_bar = VideoClip(make_frame, duration=dur).set_position((0, H - 160))
-
-        # 6. ASSEMBLY
-        final_video = CompositeVideoClip([slideshow, head_bg, headline, loc_tag, *sub_clips, prog_bar], size=(W, H)).set_audio(final_audio)
-        final_video.write_videofile(output_filename, fps=24, codec="libx264", audio_codec="aac", logger=None)
+        prog_bar = ProgressBar(dur, W, y=H - 160, bar_h=15, color=(255, 230, 0))
+
+        # 6. ASSEMBLY (header, headline and location tag never change -> pre-blended into one plate)
+        label("slideshow", slideshow); label("header", head_bg, headline, loc_tag); label("subtitles", sub_clips)
+        layers = flatten_static_layers([slideshow, head_bg, headline, loc_tag, *sub_clips], (W, H), dur)
+        final_video = prog_bar.attach(CompositeVideoClip(layers, size=(W, H))).set_audio(final_audio)
+        profiler = RenderProfiler(output_filename)
+        profiler.track(final_video, scene_id)
+        profiler.write(final_video, output_filename, fps=24, codec="libx264", audio_codec="aac", logger=None)
         
         final_video.close(); voice.close(); gc.collect()
-        if os.path.exists(tts_path): os.remove(tts_path)
         return output_filename
 
     except Exception as e:
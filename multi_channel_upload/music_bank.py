@@ -0,0 +1,41 @@
+import os
+
+from render_backend import AUDIO_FPS
+from audio_assets import PCMClip, pcm_samples
+from loudness import analyze, gain_for
+
+# --------------------------------------------------
+# BACKGROUND MUSIC BANK
+# --------------------------------------------------
+# One bank per script maps channels to music beds. Each track is decoded once per host with its
+# gain already applied (a memory-mapped .npy in the PCM cache that every worker process shares)
+# and handed out as looped slices of any length, so a scene's music costs no decode and no mixing
+# setup:
+#   MUSIC = MusicBank(MUSIC_DIR, {"SpaceMindAI": "bg_space.mp3"}, volume=0.12)
+#   bus.add(MUSIC.bed("SpaceMindAI", dur))              # or .bed(channel, dur, lufs=-32)
+class MusicBank:
+    """Channel -> pre-gained, loopable music bed."""
+
+    def __init__(self, music_dir, music_map=None, default="bg_default.mp3", volume=0.12, fps=AUDIO_FPS):
+        self.music_dir = music_dir
+        self.music_map = music_map or {}
+        self.default = default
+        self.volume = volume
+        self.fps = fps
+
+    def track(self, channel=None):
+        """Path of the channel's track (or the default), None if the file is missing."""
+        path = os.path.join(self.music_dir, self.music_map.get(channel, self.default))
+        return path if os.path.exists(path) else None
+
+    def bed(self, channel=None, duration=None, lufs=None):
+        """
+        The channel's music from its start, looped to `duration`; None without a track.
+        With `lufs` the track is levelled to that loudness instead of scaled by `volume`.
+        """
+        path = self.track(channel)
+        if path is None:
+            return None
+        gain = self.volume if lufs is None else round(gain_for(analyze(path, self.fps), lufs), 4)
+        samples = pcm_samples(path, self.fps, gain=gain)
+        return PCMClip(samples, fps=self.fps, duration=duration, loop=True)
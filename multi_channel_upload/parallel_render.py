@@ -0,0 +1,118 @@
+import os
+import shutil
+import multiprocessing
+
+from render_backend import write_video_pipe, premix_audio, frame_count
+from segment_render import segment_params, concat_copy
+
+# --------------------------------------------------
+# INTRA-VIDEO PARALLEL RENDER
+# --------------------------------------------------
+# One composition is cut into contiguous frame ranges on 1s GOP boundaries. Each worker
+# process pipes its range (frame i is always t = i / fps, exactly as a single render)
+# into its own segment, and the segments are joined with the concat demuxer, no re-encode.
+# Turn on per run with:  set RENDER_WORKERS=16
+# Linux/macOS workers fork and share the composition. On Windows each worker rebuilds it, so
+# the renderer must pass write_video(..., build=partial(...)) (create_video does); renderers
+# without one fall back to a single process there.
+
+_worker = {}
+
+def frame_ranges(n_frames, parts, fps):
+    """Splits 0..n_frames into at most `parts` ranges whose cuts fall on multiples of `fps`."""
+    if n_frames <= 0:
+        return []
+    n_gops = -(-n_frames // fps)
+    per_part = -(-n_gops // max(1, min(parts, n_gops))) * fps
+    return [range(first, min(first + per_part, n_frames)) for first in range(0, n_frames, per_part)]
+
+def _reset_readers(obj, seen=None):
+    """
+    Forked workers inherit the parent's ffmpeg reader pipes (VideoFileClip); reading them from
+    two processes interleaves frames. Drop the inherited handle so each worker opens its own.
+    """
+    seen = set() if seen is None else seen
+    if obj is None or id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    reader = getattr(obj, "reader", None)
+    if reader is not None and hasattr(reader, "initialize"):
+        reader.proc = None
+        reader.pos = float("inf")  # next get_frame re-opens the file at t
+
+    children = list(getattr(obj, "clips", None) or [])
+    children.append(getattr(obj, "mask", None))
+    children += list(getattr(obj, "overlay_source", None) or [])
+    # Clips wrapped by fl()/resize() are only reachable through their frame functions' closures
+    make_frame = getattr(obj, "make_frame", None)
+    children.append(getattr(make_frame, "__self__", None))
+    for fn in (obj, make_frame):
+        for cell in getattr(fn, "__closure__", None) or []:
+            try:
+                value = cell.cell_contents
+            except ValueError:
+                continue
+            children.append(getattr(value, "__self__", value))
+    for child in children:
+        if hasattr(child, "get_frame") or hasattr(child, "__closure__"):
+            _reset_readers(child, seen)
+
+def _init_worker(build):
+    clip = build() if build is not None else _worker["clip"]
+    if build is None:
+        _reset_readers(clip)
+    _worker["clip"] = clip.without_audio()
+
+def _render_range(job):
+    frames, path, fps, codec, preset, threads, params = job
+    write_video_pipe(_worker["clip"], path, fps=fps, codec=codec, preset=preset, threads=threads,
+                     ffmpeg_params=params, frames=frames)
+    return path
+
+def write_video_parallel(clip, filename, fps=24, workers=None, codec="libx264", audio_codec=None,
+                         preset="medium", build=None, ffmpeg_params=None):
+    """
+    Renders `clip` with `workers` processes and returns the frame count.
+
+    Linux/macOS fork the workers, so they share the already-built composition. Where fork is not
+    available (Windows), pass `build`: a picklable callable that rebuilds the clip in each worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_frames = frame_count(clip.duration, fps)
+    ranges = frame_ranges(n_frames, workers, fps)
+
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    if len(ranges) < 2 or (not fork and build is None):
+        if len(ranges) >= 2:
+            print("⚠️ No fork() here and no build function: rendering in one process.")
+        write_video_pipe(clip, filename, fps=fps, codec=codec, audio_codec=audio_codec, preset=preset,
+                         ffmpeg_params=ffmpeg_params)
+        return n_frames
+
+    part_dir = os.path.splitext(filename)[0] + "_parts"
+    os.makedirs(part_dir, exist_ok=True)
+    threads = max(1, (os.cpu_count() or 1) // len(ranges))
+    params = segment_params(fps) + (ffmpeg_params or [])
+    jobs = [(frames, os.path.join(part_dir, f"part_{k:03d}.mp4"), fps, codec, preset, threads, params)
+            for k, frames in enumerate(ranges)]
+    print(f"🧵 Rendering {n_frames} frames in {len(ranges)} ranges...")
+
+    if fork:
+        _worker["clip"] = clip
+        ctx, build = multiprocessing.get_context("fork"), None
+    else:
+        ctx = multiprocessing.get_context("spawn")
+    try:
+        with ctx.Pool(len(ranges), initializer=_init_worker, initargs=(build,)) as pool:
+            pending = pool.map_async(_render_range, jobs)
+            # The parent mixes the audio while the workers render
+            audio_path = None
+            if clip.audio is not None:
+                audio_path = premix_audio(clip.audio, os.path.join(part_dir, "audio.wav"))
+            parts = pending.get()
+        concat_copy(parts, filename, audio_path=audio_path, audio_codec=audio_codec)
+    finally:
+        _worker.pop("clip", None)
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return n_frames
@@ -0,0 +1,163 @@
+import os
+import time
+import subprocess
+import numpy as np
+from moviepy.config import get_setting
+
+from compositor import composite_into
+
+# --------------------------------------------------
+# BACKEND SELECTION
+# --------------------------------------------------
+# "moviepy" -> clip.write_videofile (default)
+# "pipe"    -> uint8 frames streamed straight into one ffmpeg rawvideo pipe
+# Pick per run without touching code:  set RENDER_BACKEND=pipe
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "moviepy").lower()
+# >1 splits one video into time ranges rendered by that many processes (see parallel_render.py)
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "1"))
+# 1 renders a quick draft for the "Upload?" prompt; the full render only runs once approved
+REVIEW_DRAFT = os.environ.get("REVIEW_DRAFT", "0") == "1"
+AUDIO_FPS = 44100
+
+# --------------------------------------------------
+# RENDER PROFILES
+# --------------------------------------------------
+# draft: a quarter of the pixels (half per side), 12 fps, ultrafast. Same scene graph,
+# so TTS, images, text and plates built for the draft are reused by the final render.
+PROFILES = {
+    "final": {"scale": 1.0, "fps": None, "preset": None},
+    "draft": {"scale": 0.5, "fps": 12, "preset": "ultrafast"},
+}
+
+def draft_path(filename):
+    base, ext = os.path.splitext(filename)
+    return f"{base}_draft{ext}"
+
+def frame_count(duration, fps):
+    """Same frame count as moviepy's iter_frames (np.arange(0, duration, 1/fps))."""
+    return len(np.arange(0, duration, 1.0 / fps))
+
+# --------------------------------------------------
+# AUDIO PRE-MIX
+# --------------------------------------------------
+def premix_audio(audio, wav_path, fps=AUDIO_FPS):
+    """Mixes the whole audio track once into a 16-bit WAV for the encoder to mux."""
+    from audio_assets import is_plain, clip_samples, write_wav
+    if is_plain(audio, fps):
+        # Already one buffer (an AudioBus mix): write it out directly
+        return write_wav(clip_samples(audio, fps), wav_path, fps)
+    audio.write_audiofile(wav_path, fps=fps, nbytes=2, codec="pcm_s16le", logger=None)
+    return wav_path
+
+# --------------------------------------------------
+# RAW-FRAME PIPE BACKEND
+# --------------------------------------------------
+def write_video_pipe(clip, filename, fps=24, codec="libx264", audio_codec=None, preset="medium",
+                     threads=None, ffmpeg_params=None, audio_file=None, frames=None):
+    """
+    Renders `clip` by compositing every frame into one preallocated uint8 buffer and writing it
+    to ffmpeg's stdin. Audio is pre-mixed to a WAV once and muxed by the same ffmpeg call.
+    `frames` limits the render to a range of global frame indices (frame i is always t = i / fps).
+    """
+    w, h = clip.size
+    frames = frames if frames is not None else range(frame_count(clip.duration, fps))
+    n_frames = len(frames)
+
+    temp_wav = None
+    if audio_file is None and clip.audio is not None:
+        temp_wav = premix_audio(clip.audio, f"{os.path.splitext(filename)[0]}_premix.wav")
+        audio_file = temp_wav
+
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+           "-f", "rawvideo", "-vcodec", "rawvideo", "-s", f"{w}x{h}", "-pix_fmt", "rgb24",
+           "-r", str(fps), "-i", "-"]
+    if audio_file:
+        cmd += ["-i", audio_file, "-map", "0:v:0", "-map", "1:a:0", "-c:a", audio_codec or "aac"]
+    cmd += ["-c:v", codec, "-preset", preset, "-pix_fmt", "yuv420p"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += (ffmpeg_params or []) + [filename]
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    buf = np.empty((h, w, 3), dtype=np.uint8)
+    try:
+        for i in frames:
+            composite_into(buf, clip, i / fps)
+            proc.stdin.write(memoryview(buf))
+        proc.stdin.close()
+        err = proc.stderr.read().decode(errors="ignore")
+        if proc.wait() != 0:
+            raise IOError(f"ffmpeg pipe failed for {filename}:\n{err}")
+    except BrokenPipeError:
+        proc.wait()
+        raise IOError(f"ffmpeg pipe closed early for {filename}:\n{proc.stderr.read().decode(errors='ignore')}")
+    finally:
+        if temp_wav and os.path.exists(temp_wav):
+            os.remove(temp_wav)
+    return n_frames
+
+# --------------------------------------------------
+# SINGLE ENTRY POINT FOR ALL RENDERERS
+# --------------------------------------------------
+def write_video(clip, filename, fps=24, codec="libx264", audio_codec=None, preset="medium",
+                threads=None, ffmpeg_params=None, backend=None, logger="bar", workers=None,
+                profile="final", build=None):
+    """
+    Writes `clip` with the selected backend and profile, and reports render throughput.
+    `build` is a picklable callable that rebuilds `clip` (without needing the parent's objects):
+    parallel renders on Windows, where workers cannot fork, use it to compose their own copy.
+    """
+    backend = (backend or RENDER_BACKEND).lower()
+    workers = workers or RENDER_WORKERS
+    settings = PROFILES[profile]
+    fps = settings["fps"] or fps
+    preset = settings["preset"] or preset
+    if settings["scale"] != 1.0:
+        # Scaled by ffmpeg on the way into the encoder (even sizes for yuv420p)
+        scale = settings["scale"]
+        ffmpeg_params = (ffmpeg_params or []) + ["-vf", f"scale=trunc(iw*{scale}/2)*2:trunc(ih*{scale}/2)*2"]
+    start = time.time()
+
+    if workers > 1:
+        from parallel_render import write_video_parallel
+        n_frames = write_video_parallel(clip, filename, fps=fps, workers=workers, codec=codec,
+                                        audio_codec=audio_codec, preset=preset, build=build,
+                                        ffmpeg_params=ffmpeg_params)
+        backend = f"parallel x{workers}"
+    elif backend == "pipe":
+        n_frames = write_video_pipe(clip, filename, fps=fps, codec=codec, audio_codec=audio_codec,
+                                    preset=preset, threads=threads, ffmpeg_params=ffmpeg_params)
+    else:
+        clip.write_videofile(filename, fps=fps, codec=codec, audio_codec=audio_codec, preset=preset,
+                             threads=threads, ffmpeg_params=ffmpeg_params, logger=logger)
+        n_frames = frame_count(clip.duration, fps)
+
+    elapsed = max(time.time() - start, 1e-6)
+    stats = {"backend": backend, "frames": n_frames, "seconds": round(elapsed, 2),
+             "fps": round(n_frames / elapsed, 2)}
+    if profile != "final":
+        backend = f"{backend}, {profile}"
+    print(f"⏱️ [{backend}] {os.path.basename(filename)}: {n_frames} frames in {elapsed:.1f}s ({stats['fps']} fps)")
+    return stats
+
+# --------------------------------------------------
+# DRAFT -> REVIEW -> FINAL
+# --------------------------------------------------
+def render_for_review(clip, filename, question, on_ready=None, write=None, **kwargs):
+    """
+    Renders `clip`, calls on_ready(path) and asks `question` (y/n); returns True on 'y'.
+    With REVIEW_DRAFT=1 the question is asked over a draft, and the full render of the
+    same clip only runs after a 'y'. `write` replaces write_video (e.g. a profiler's write).
+    """
+    write = write or write_video
+    review_file = draft_path(filename) if REVIEW_DRAFT else filename
+    write(clip, review_file, profile="draft" if REVIEW_DRAFT else "final", **kwargs)
+    print(f"\n✅ {'Draft ready for review' if REVIEW_DRAFT else 'Video Generated'}: {review_file}")
+    if on_ready:
+        on_ready(review_file)
+
+    approved = input(question).lower().strip() == 'y'
+    if approved and REVIEW_DRAFT:
+        write(clip, filename, **kwargs)
+        print(f"✅ Video Generated: {filename}")
+    return approved
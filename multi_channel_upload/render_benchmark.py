@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import builtins
+import statistics
+import subprocess
+import numpy as np
+from PIL import Image, ImageDraw
+
+# --------------------------------------------------
+# OFFLINE RENDER BENCHMARK
+# --------------------------------------------------
+# Runs every renderer on synthetic fixtures (seeded placeholder images, tone "voices"),
+# each run in a fresh process, and reports fps, wall time and peak RSS. No network:
+# gTTS is swapped for the tone fixture below, and image searches go to the "local" provider
+# (image_providers) over the fixture images, so the fetch stage runs for real.
+#
+#   python render_benchmark.py                       # all renderers, 3 runs each
+#   python render_benchmark.py --cases create_video --runs 5
+#   python render_benchmark.py --baseline bench_work/benchmark_results.json
+#   set TTS_ENGINE=local & python render_benchmark.py   # real offline TTS instead of tone voices
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAGE2_DIR = os.path.join(HERE, "..", "videos_with_local_images_prefetched", "component_based _ver2")
+PROCESSOR_DIR = os.path.join(HERE, "modular_stable_ver_2")
+
+N_ITEMS = 3
+SECONDS_PER_WORD = 0.3
+REGRESSION_TOLERANCE = 0.10
+
+HEADLINES = ["Markets Rally On Rate Cut Hopes", "Monsoon Arrives Early In Kerala",
+             "Local Team Wins Final Over Thriller", "New Metro Line Opens Downtown",
+             "Scientists Map Deep Ocean Trench"]
+
+# --------------------------------------------------
+# FIXTURES
+# --------------------------------------------------
+def make_images(folder, count=5, size=(1280, 720), seed=7):
+    """Deterministic placeholder photos: gradient, a few shapes and noise (so JPEG work is realistic)."""
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for k in range(count):
+        w, h = size
+        ramp = np.linspace(0, 1, w, dtype=np.float32)[None, :, None]
+        base = np.array(rng.integers(40, 220, 3), np.float32)
+        img = (base * (0.5 + ramp) + rng.normal(0, 12, (h, w, 3))).clip(0, 255).astype("uint8")
+        pil = Image.fromarray(img)
+        draw = ImageDraw.Draw(pil)
+        for _ in range(6):
+            x, y = int(rng.integers(0, w - 200)), int(rng.integers(0, h - 200))
+            draw.ellipse([x, y, x + 200, y + 160], fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+        path = os.path.join(folder, f"img_{k}.jpg")
+        pil.save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+def tone_mp3(path, duration, freq=220):
+    from moviepy.config import get_setting
+    subprocess.run([get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency={freq}:duration={duration}:sample_rate=44100", "-ac", "2", path],
+                   check=True)
+    return path
+
+def make_fixtures(fixture_dir):
+    """Writes news_data.json, quiz_data.json, scenes.json, the image set and stage2's voice/media files."""
+    images = make_images(os.path.join(fixture_dir, "images"))
+    items = []
+    for i in range(N_ITEMS):
+        headline = HEADLINES[i % len(HEADLINES)]
+        items.append({
+            "headline": headline,
+            "hook_text": f"Breaking update number {i + 1}",
+            "details": f"{headline}. Officials said more details will follow later today as the story develops.",
+            "location": "Hyderabad",
+            "search_key": headline,
+            "channel": "trendwave_now",
+            "metadata": {"search_key": headline},
+        })
+    for name in ("news_data.json", "quiz_data.json"):
+        with open(os.path.join(fixture_dir, name), "w", encoding="utf-8") as f:
+            json.dump(items, f, indent=2)
+
+    scenes = {"id": "bench_stage2", "scenes": [{"content": it["details"]} for it in items]}
+    with open(os.path.join(fixture_dir, "scenes.json"), "w", encoding="utf-8") as f:
+        json.dump(scenes, f, indent=2)
+    for i, it in enumerate(scenes["scenes"]):
+        tone_mp3(os.path.join(fixture_dir, f"v_{i}.mp3"), _speech_seconds(it["content"]))
+        media = os.path.join(fixture_dir, "media_bank", f"scene_{i}")
+        os.makedirs(media, exist_ok=True)
+        for p in images[:2]:
+            shutil.copy(p, media)
+    return images
+
+def _speech_seconds(text):
+    return max(1.0, round(len(text.split()) * SECONDS_PER_WORD * 2) / 2)
+
+class ToneTTS:
+    """Offline gTTS stand-in: a tone as long as the text would take to speak."""
+    cache_dir = None
+
+    def __init__(self, text, lang="en", **kwargs):
+        self.seconds = _speech_seconds(text)
+
+    def save(self, path):
+        cached = os.path.join(self.cache_dir, f"tone_{self.seconds}.mp3")
+        if not os.path.exists(cached):
+            tone_mp3(cached, self.seconds)
+        shutil.copy(cached, path)
+
+# --------------------------------------------------
+# RENDERER CASES (run inside the child process)
+# --------------------------------------------------
+def _case_processor(work):
+    sys.path.insert(0, PROCESSOR_DIR)
+    import processor
+    out = None
+    for i in range(N_ITEMS):
+        out = processor.generate_video_single(os.path.join(work, "news_data.json"), i, "trendwave_now", "2026-01-01")
+        if out is None:
+            raise RuntimeError(f"generate_video_single failed on item {i}")
+    return processor
+
+def _case_create_video(work):
+    import create_video
+    create_video.generate_video(os.path.join(work, "news_data.json"))
+    return create_video
+
+def _case_stage2(work):
+    sys.path.insert(0, STAGE2_DIR)
+    import stage2_render
+    stage2_render.render_video(os.path.join(work, "scenes.json"))
+    return stage2_render
+
+def _case_quiz(work):
+    import create_quiz_video
+    if create_quiz_video.generate_quiz_video(os.path.join(work, "quiz_data.json")) is None:
+        raise RuntimeError("generate_quiz_video returned nothing")
+    return create_quiz_video
+
+CASES = {
+    "processor": ("processor", "generate_video_single", _case_processor),
+    "create_video": ("create_video", "generate_video", _case_create_video),
+    "stage2_render": ("stage2_render", "render_video", _case_stage2),
+    "create_quiz_video": ("create_quiz_video", "generate_quiz_video", _case_quiz),
+}
+
+def _peak_rss_mb():
+    """Peak resident memory of this process and of its largest child (ffmpeg), in MB."""
+    try:
+        import resource
+        scale = 1 / 1024 / 1024 if sys.platform == "darwin" else 1 / 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+        return round(own, 1), round(child, 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 1024 / 1024, 1), None
+        except (ImportError, AttributeError):
+            return None, None
+
+def run_case(name, work, result_path):
+    """Child process: patch the network calls and the writer, run one renderer, dump its numbers."""
+    sys.path.insert(0, HERE)
+    os.chdir(work)
+    # Fresh TTS, PCM and image caches per run, so every run synthesizes, decodes and crawls the same amount
+    os.environ["TTS_CACHE_DIR"] = os.path.join(work, ".tts_cache")
+    os.environ["PCM_CACHE_DIR"] = os.path.join(work, ".pcm_cache")
+    os.environ["IMAGE_CACHE_DIR"] = os.path.join(work, ".image_cache")
+    os.environ["IMAGE_PROVIDERS"] = "local"
+    os.environ["IMAGE_CORPUS_DIR"] = os.path.join(work, "images")
+    import render_backend
+    written = []
+    write_video = render_backend.write_video
+
+    def recording_write(*args, **kwargs):
+        stats = write_video(*args, **kwargs)
+        written.append(stats)
+        return stats
+
+    # Must happen before the renderer imports write_video by name
+    render_backend.write_video = recording_write
+    ToneTTS.cache_dir = work
+    builtins.input = lambda *a: "n"
+
+    import gtts
+    gtts.gTTS = ToneTTS
+
+    start = time.perf_counter()
+    CASES[name][2](work)
+    wall = time.perf_counter() - start
+
+    frames = sum(s["frames"] for s in written)
+    render_seconds = sum(s["seconds"] for s in written)
+    own_rss, child_rss = _peak_rss_mb()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"frames": frames, "wall_seconds": round(wall, 3),
+                   "render_fps": round(frames / max(render_seconds, 1e-9), 2),
+                   "peak_rss_mb": own_rss, "peak_child_rss_mb": child_rss}, f)
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+def benchmark(cases, runs, bench_dir):
+    fixture_dir = os.path.join(bench_dir, "fixtures")
+    if not os.path.exists(os.path.join(fixture_dir, "scenes.json")):
+        print("🧪 Building fixtures...")
+        make_fixtures(fixture_dir)
+
+    results = {}
+    for name in cases:
+        samples = []
+        for r in range(runs):
+            work = os.path.join(bench_dir, f"{name}_run{r}")
+            shutil.rmtree(work, ignore_errors=True)
+            shutil.copytree(fixture_dir, work)
+            result_path = os.path.join(work, "result.json")
+            print(f"⏱️ {name} run {r + 1}/{runs}...")
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name,
+                                   "--work", work, "--result", result_path],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0 or not os.path.exists(result_path):
+                # Renderers that swallow their own exceptions only print them
+                errors = [l for l in proc.stdout.splitlines() if "❌" in l]
+                print(f"❌ {name} failed:\n" + "\n".join(errors[-5:] + [proc.stderr.strip()[-1500:]]))
+                break
+            with open(result_path, encoding="utf-8") as f:
+                samples.append(json.load(f))
+            shutil.rmtree(work, ignore_errors=True)
+        if samples:
+            median = lambda key: statistics.median(s[key] for s in samples if s[key] is not None) \
+                if any(s[key] is not None for s in samples) else None
+            results[name] = {"entry": ".".join(CASES[name][:2]), "runs": len(samples),
+                             "frames": samples[0]["frames"], "render_fps": median("render_fps"),
+                             "wall_seconds": median("wall_seconds"), "peak_rss_mb": median("peak_rss_mb"),
+                             "peak_child_rss_mb": median("peak_child_rss_mb")}
+    return results
+
+def print_table(results, baseline=None):
+    print(f"\n{'renderer':<20}{'frames':>8}{'fps':>10}{'wall s':>10}{'rss MB':>10}{'ffmpeg MB':>11}  vs baseline")
+    regressions = []
+    for name, r in results.items():
+        delta = ""
+        if baseline and name in baseline and baseline[name]["render_fps"]:
+            change = r["render_fps"] / baseline[name]["render_fps"] - 1
+            delta = f"{change:+.1%}"
+            if change < -REGRESSION_TOLERANCE:
+                delta += "  ⚠️ slower"
+                regressions.append(name)
+        print(f"{name:<20}{r['frames']:>8}{r['render_fps']:>10.1f}{r['wall_seconds']:>10.2f}"
+              f"{r['peak_rss_mb'] or 0:>10.0f}{r['peak_child_rss_mb'] or 0:>11.0f}  {delta}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline render benchmark")
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--dir", default=os.path.join(HERE, "bench_work"))
+    parser.add_argument("--baseline", help="earlier benchmark_results.json to compare against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--work", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_case(args.child, args.work, args.result)
+
+    os.makedirs(args.dir, exist_ok=True)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    results = benchmark(args.cases, args.runs, os.path.abspath(args.dir))
+    regressions = print_table(results, baseline)
+
+    out_path = os.path.join(args.dir, "benchmark_results.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📝 Results: {out_path}")
+    if regressions:
+        print(f"⚠️ fps regressions over {REGRESSION_TOLERANCE:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
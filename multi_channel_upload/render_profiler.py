@@ -0,0 +1,134 @@
+import os
+import json
+import time
+from collections import defaultdict
+
+import render_backend
+
+# --------------------------------------------------
+# PROFILING MODE
+# --------------------------------------------------
+# Times every layer's get_frame (and its mask), the progress bar, compositing/blending,
+# audio mixing and the ffmpeg side of a render. Turn on per run with:  set RENDER_PROFILE=1
+# Writes <video>_profile.json next to the output and prints a summary table.
+RENDER_PROFILE = os.environ.get("RENDER_PROFILE", "0") == "1"
+
+def label(name, *clips):
+    """Names layers for the profile report (also works on lists of clips, e.g. subtitles)."""
+    for clip in clips:
+        for c in (clip if isinstance(clip, (list, tuple)) else [clip]):
+            c.layer_name = name
+    return clips[0] if len(clips) == 1 else clips
+
+class RenderProfiler:
+    """Collects per-scene, per-layer timings for one output video. Does nothing when disabled."""
+
+    def __init__(self, name, enabled=None):
+        self.name = name
+        self.enabled = RENDER_PROFILE if enabled is None else enabled
+        self.layers = defaultdict(lambda: {"seconds": 0.0, "calls": 0})
+        self.sections = defaultdict(float)
+        self.frames = 0
+
+    def _timed(self, fn, add):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                add(time.perf_counter() - start)
+        return timed
+
+    def _layer_timer(self, scene, layer):
+        entry = self.layers[(str(scene), layer)]
+        def add(seconds):
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+        return add
+
+    def track(self, clip, scene="all"):
+        """Instruments the top-level layers of a scene composite (and an attached progress bar)."""
+        if not self.enabled:
+            return clip
+        overlay = getattr(clip, "overlay_source", None)
+        if overlay is not None:
+            source, drawer, _ = overlay
+            drawer.draw = self._timed(drawer.draw, self._layer_timer(scene, "progress_bar"))
+            self.track(source, scene)
+            return clip
+
+        for i, layer in enumerate(getattr(clip, "clips", [])):
+            name = getattr(layer, "layer_name", None) or f"{i}:{type(layer).__name__}"
+            layer.get_frame = self._timed(layer.get_frame, self._layer_timer(scene, name))
+            if layer.mask is not None:
+                layer.mask.get_frame = self._timed(layer.mask.get_frame, self._layer_timer(scene, f"{name} (mask)"))
+        return clip
+
+    def write(self, clip, filename, **kwargs):
+        """render_backend.write_video with frame composition, audio and ffmpeg time split out."""
+        if not self.enabled:
+            return render_backend.write_video(clip, filename, **kwargs)
+        if (kwargs.get("workers") or render_backend.RENDER_WORKERS) > 1:
+            print("⚠️ Profiling needs a single render process; ignoring RENDER_WORKERS.")
+            kwargs["workers"] = 1
+
+        # One report per written file (a draft and its final render are reported separately)
+        for entry in self.layers.values():
+            entry.update(seconds=0.0, calls=0)
+        self.sections.clear()
+        self.frames = 0
+
+        def add_to(section):
+            def add(seconds):
+                self.sections[section] += seconds
+            return add
+
+        # The pipe backend composites through composite_into, moviepy through clip.get_frame
+        composite_into = render_backend.composite_into
+        if (kwargs.get("backend") or render_backend.RENDER_BACKEND).lower() == "pipe":
+            render_backend.composite_into = self._timed(composite_into, add_to("compose"))
+        else:
+            clip.get_frame = self._timed(clip.get_frame, add_to("compose"))
+        if clip.audio is not None:
+            clip.audio.get_frame = self._timed(clip.audio.get_frame, add_to("audio"))
+        start = time.perf_counter()
+        try:
+            stats = render_backend.write_video(clip, filename, **kwargs)
+        finally:
+            render_backend.composite_into = composite_into
+        self.sections["total"] += time.perf_counter() - start
+        self.frames += stats["frames"]
+        self.report(os.path.splitext(filename)[0] + "_profile.json")
+        return stats
+
+    def report(self, json_path):
+        """Writes the JSON report and prints a per-layer summary table."""
+        layer_total = sum(v["seconds"] for v in self.layers.values())
+        sections = {
+            "layers": layer_total,
+            "blend_and_composite": max(0.0, self.sections["compose"] - layer_total),
+            "audio": self.sections["audio"],
+            "ffmpeg_write": max(0.0, self.sections["total"] - self.sections["compose"] - self.sections["audio"]),
+        }
+        scenes = defaultdict(dict)
+        for (scene, layer), v in self.layers.items():
+            scenes[scene][layer] = {"seconds": round(v["seconds"], 4), "calls": v["calls"],
+                                    "ms_per_call": round(1000 * v["seconds"] / max(1, v["calls"]), 3)}
+        report = {"video": self.name, "frames": self.frames, "wall_seconds": round(self.sections["total"], 3),
+                  "sections": {k: round(v, 4) for k, v in sections.items()}, "scenes": scenes}
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        total = max(self.sections["total"], 1e-9)
+        by_layer = defaultdict(float)
+        for (_, layer), v in self.layers.items():
+            by_layer[layer] += v["seconds"]
+        rows = sorted(by_layer.items(), key=lambda kv: -kv[1])
+        rows += [(k, v) for k, v in sections.items() if k != "layers"]
+
+        print(f"\n📊 Render profile: {self.name} ({self.frames} frames, {total:.1f}s)")
+        print(f"   {'section':<34}{'seconds':>10}{'share':>9}")
+        for name, seconds in rows:
+            print(f"   {name[:34]:<34}{seconds:>10.2f}{100 * seconds / total:>8.1f}%")
+        print(f"   📝 {json_path}")
+        return report
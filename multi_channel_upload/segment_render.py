@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from moviepy.editor import CompositeVideoClip
+from moviepy.config import get_setting
+
+from render_backend import write_video, premix_audio, frame_count
+from audio_assets import read_wav
+from audio_bus import AudioBus
+
+# --------------------------------------------------
+# SEGMENT MODE
+# --------------------------------------------------
+# Each scene is encoded to its own video-only segment (+ its audio as WAV), then the
+# segments are stitched with ffmpeg's concat demuxer without re-encoding the video.
+# Turn on per run with:  set SEGMENT_MODE=1   (parallel scenes: set SEGMENT_WORKERS=4)
+SEGMENT_MODE = os.environ.get("SEGMENT_MODE", "0") == "1"
+SEGMENT_WORKERS = int(os.environ.get("SEGMENT_WORKERS", "1"))
+
+def segment_params(fps):
+    """Identical, GOP-aligned encoder settings for every segment so they can be joined with -c copy."""
+    return ["-g", str(fps), "-keyint_min", str(fps), "-sc_threshold", "0",
+            "-profile:v", "high", "-video_track_timescale", "90000"]
+
+def _seg_paths(work_dir, index, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    base = os.path.join(work_dir, f"seg_{index:03d}_{digest}")
+    return base + ".mp4", base + ".wav", base + ".json"
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# --------------------------------------------------
+# ONE SEGMENT
+# --------------------------------------------------
+def encode_segment(scene, video_path, wav_path, meta_path, fps=24, preset="medium"):
+    """Encodes one scene (video only) and its audio; meta is written last, marking it complete."""
+    n_frames = frame_count(scene.duration, fps)
+    tmp_video = video_path.replace(".mp4", ".part.mp4")
+    write_video(scene.without_audio(), tmp_video, fps=fps, codec="libx264", preset=preset,
+                ffmpeg_params=segment_params(fps), logger=None)
+    os.replace(tmp_video, video_path)
+
+    if scene.audio is not None:
+        premix_audio(scene.audio, wav_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"duration": n_frames / fps, "frames": n_frames, "has_audio": scene.audio is not None}, f)
+    return video_path
+
+# --------------------------------------------------
+# SCENES -> SEGMENTS -> ONE FILE
+# --------------------------------------------------
+def render_segmented(scene_jobs, out_path, fps=24, tail_overlays=None, tail_key="", music=None,
+                     workers=None, preset="medium", work_dir=None):
+    """
+    scene_jobs    : list of (key, build_fn). `key` identifies the scene content (e.g. its JSON);
+                    a finished segment with the same key is reused instead of re-rendered.
+    tail_overlays : clips pinned to the end of the whole video (CTA). Only the segments they
+                    overlap are composed with them, under a key that also includes `tail_key`.
+    music         : optional fn(audio_clip) -> audio_clip to lay global music over the joined voice.
+    """
+    work_dir = work_dir or os.path.join(os.path.dirname(os.path.abspath(out_path)), "segments")
+    os.makedirs(work_dir, exist_ok=True)
+    workers = workers or SEGMENT_WORKERS
+    tail_overlays = tail_overlays or []
+    built = {}
+
+    def scene_clip(i):
+        if i not in built:
+            built[i] = scene_jobs[i][1]()
+        return built[i]
+
+    # 1. Durations: from finished segments when available, otherwise build the scene
+    def duration_of(i):
+        key = scene_jobs[i][0]
+        meta = (_read_meta(_seg_paths(work_dir, i, key)[2]) or
+                _read_meta(_seg_paths(work_dir, i, key + f"|tail:{tail_key}")[2]))
+        return meta["duration"] if meta else frame_count(scene_clip(i).duration, fps) / fps
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        durations = list(pool.map(duration_of, range(len(scene_jobs))))
+    offsets = [sum(durations[:i]) for i in range(len(durations))]
+    total = sum(durations)
+
+    # 2. Which trailing scenes do the tail overlays touch?
+    tail_len = max((c.duration for c in tail_overlays), default=0)
+    affected = {i for i in range(len(durations)) if tail_len and offsets[i] + durations[i] > total - tail_len}
+
+    # 3. Encode missing segments (scenes in parallel)
+    def ensure_segment(i):
+        key = scene_jobs[i][0] + (f"|tail:{tail_key}" if i in affected else "")
+        video_path, wav_path, meta_path = _seg_paths(work_dir, i, key)
+        if _read_meta(meta_path) and os.path.exists(video_path):
+            print(f"♻️ Segment {i + 1} reused")
+            return video_path, wav_path
+
+        scene = scene_clip(i)
+        if i in affected:
+            local = [c.set_start(total - c.duration - offsets[i]) for c in tail_overlays]
+            scene = CompositeVideoClip([scene, *local], size=scene.size).set_duration(scene.duration)
+        print(f"🎞️ Encoding segment {i + 1}/{len(scene_jobs)}...")
+        encode_segment(scene, video_path, wav_path, meta_path, fps=fps, preset=preset)
+        return video_path, wav_path
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        segments = list(pool.map(ensure_segment, range(len(scene_jobs))))
+
+    return stitch_segments(segments, offsets, total, out_path, music=music)
+
+def stitch_segments(segments, offsets, total, out_path, music=None):
+    """Concat-demuxes the video segments (no re-encode) and muxes the joined, frame-aligned audio."""
+    work_dir = os.path.dirname(segments[0][0])
+
+    # Each scene's audio starts exactly at its segment's first frame
+    bus = AudioBus()
+    for (_, wav), offset in zip(segments, offsets):
+        if os.path.exists(wav):
+            bus.add(read_wav(wav), start=offset)
+    audio_path = None
+    if bus.tracks or music:
+        audio = bus.to_clip(total) if bus.tracks else None
+        if music:
+            audio = music(audio)
+        audio_path = premix_audio(audio, os.path.join(work_dir, "joined_audio.wav"))
+
+    concat_copy([video_path for video_path, _ in segments], out_path, audio_path=audio_path)
+    print(f"🧩 Stitched {len(segments)} segments -> {out_path}")
+    return out_path
+
+def concat_copy(video_paths, out_path, audio_path=None, audio_codec="aac"):
+    """Joins identically-encoded segments with the concat demuxer (-c:v copy), optionally muxing one audio file."""
+    list_path = os.path.splitext(out_path)[0] + "_concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for video_path in video_paths:
+            escaped = os.path.abspath(video_path).replace("\\", "/").replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+           "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", audio_codec or "aac"]
+    cmd += ["-c:v", "copy", "-movflags", "+faststart", out_path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    os.remove(list_path)
+    if result.returncode != 0:
+        raise IOError(f"ffmpeg concat failed:\n{result.stderr}")
+    return out_path
@@ -0,0 +1,15 @@
+import os
+import sys
+
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from parallel_render import frame_ranges
+
+def test_ranges_cover_every_frame_on_gop_cuts():
+    ranges = frame_ranges(250, 4, 24)
+    assert [f for r in ranges for f in r] == list(range(250))
+    assert all(r.start % 24 == 0 for r in ranges)
+    assert len(ranges) <= 4
+
+def test_no_frames_gives_no_ranges():
+    assert frame_ranges(0, 4, 24) == []
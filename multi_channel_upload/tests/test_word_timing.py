@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from word_timing import phrase_timings
+
+WORDS = [{"word": w, "start": s, "end": s + 0.3} for w, s in
+         [("Breaking", 0.0), ("news.", 0.4), ("Markets", 1.2), ("rally", 1.6), ("today.", 2.0), ("Wow!", 2.8)]]
+
+def test_phrases_start_at_their_first_word():
+    spans = phrase_timings(WORDS, ["Breaking news.", "Markets rally today."], 3.5)
+    assert spans == [(0.0, 1.2), (1.2, 3.5)]
+
+def test_one_word_phrase_is_found():
+    spans = phrase_timings(WORDS, ["Breaking news.", "Markets", "rally today.", "Wow!"], 3.5)
+    assert spans == [(0.0, 1.2), (1.2, 1.6), (1.6, 2.8), (2.8, 3.5)]
+
+def test_one_word_phrase_after_skipped_words():
+    # "Markets" is not on screen: the cursor guess would start "rally" 0.4s early
+    spans = phrase_timings(WORDS, ["Breaking news.", "rally", "today."], 3.5)
+    assert spans == [(0.0, 1.6), (1.6, 2.0), (2.0, 3.5)]
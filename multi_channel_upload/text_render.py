@@ -0,0 +1,181 @@
+import os
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+from moviepy.editor import ImageClip
+
+# --------------------------------------------------
+# FONT LOOKUP (ImageMagick names -> font files)
+# --------------------------------------------------
+# Windows names first, then the Linux render boxes (Liberation is metric-compatible with Arial)
+FONT_FILES = {
+    "arial-bold": ["arialbd.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf"],
+    "arial": ["arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSans.ttf"],
+    "courier": ["cour.ttf", "Courier New.ttf", "LiberationMono-Regular.ttf", "DejaVuSansMono.ttf"],
+}
+FONT_DIRS = [
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+    "/usr/share/fonts/truetype/liberation",
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/liberation",
+    "/usr/share/fonts/dejavu",
+    "/Library/Fonts",
+]
+
+@lru_cache(maxsize=64)
+def get_font(font, fontsize):
+    """Loads `font` (ImageMagick name, file name or path) at `fontsize` px, with fallbacks."""
+    candidates = [font] + FONT_FILES.get(str(font).lower(), []) + [f"{font}.ttf"]
+    for name in candidates:
+        paths = [name] + [os.path.join(d, name) for d in FONT_DIRS]
+        for path in paths:
+            try:
+                return ImageFont.truetype(path, fontsize)
+            except (OSError, ValueError):
+                continue
+    print(f"⚠️ Font '{font}' not found, using Pillow default.")
+    return ImageFont.load_default(fontsize)
+
+def to_rgba(color):
+    if color is None or color == "transparent":
+        return (0, 0, 0, 0)
+    if isinstance(color, str):
+        return ImageColor.getcolor(color, "RGBA")
+    color = tuple(int(c) for c in color)
+    return color if len(color) == 4 else color + (255,)
+
+# --------------------------------------------------
+# LAYOUT (same wrapping/gravity rules as ImageMagick caption/label)
+# --------------------------------------------------
+GRAVITY = {
+    "center": ("center", "center"), "north": ("center", "top"), "south": ("center", "bottom"),
+    "west": ("left", "center"), "east": ("right", "center"),
+    "northwest": ("left", "top"), "northeast": ("right", "top"),
+    "southwest": ("left", "bottom"), "southeast": ("right", "bottom"),
+    "left": ("left", "center"), "right": ("right", "center"),
+}
+
+def wrap_lines(text, font, max_width):
+    """Greedy word wrap on pixel width; explicit newlines are kept."""
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            trial = f"{line} {word}" if line else word
+            if not line or font.getlength(trial) <= max_width:
+                line = trial
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+def _block_size(lines, font, interline, pad):
+    ascent, descent = font.getmetrics()
+    line_h = ascent + descent
+    width = max((font.getlength(l) for l in lines), default=0)
+    height = line_h * len(lines) + interline * max(0, len(lines) - 1)
+    return int(np.ceil(width)) + 2 * pad, height + 2 * pad, line_h
+
+def _fit_fontsize(text, font, size, method, interline, pad):
+    """Largest font size whose block fits `size` (what ImageMagick does without -pointsize)."""
+    lo, hi, best = 6, 400, 6
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        f = get_font(font, mid)
+        lines = wrap_lines(text, f, size[0] - 2 * pad) if method == "caption" else text.split("\n")
+        bw, bh, _ = _block_size(lines, f, interline, pad)
+        if bw <= size[0] and (size[1] is None or bh <= size[1]):
+            best, lo = mid, mid + 1
+        else:
+            hi = mid - 1
+    return best
+
+# --------------------------------------------------
+# RASTERIZER
+# --------------------------------------------------
+def _over(dst, color, coverage):
+    """Straight-alpha 'over' of a flat colour with per-pixel coverage onto an RGBA float array."""
+    src_a = coverage * (color[3] / 255.0)
+    dst_a = dst[:, :, 3]
+    out_a = src_a + dst_a * (1 - src_a)
+    rgb = (np.array(color[:3], np.float32) * src_a[:, :, None] +
+           dst[:, :, :3] * (dst_a * (1 - src_a))[:, :, None])
+    dst[:, :, :3] = np.divide(rgb, out_a[:, :, None], out=np.zeros_like(rgb), where=out_a[:, :, None] > 0)
+    dst[:, :, 3] = out_a
+
+@lru_cache(maxsize=256)
+def render_text(txt, fontsize=None, color="black", font="Courier", size=None, bg_color="transparent",
+                stroke_color=None, stroke_width=1, method="label", align="center", interline=0):
+    """
+    Rasterizes text in-process and returns an (h, w, 4) uint8 RGBA array.
+
+    label  : image is the tight layout box of the text (or `size` if given).
+    caption: words wrap to size[0]; height is size[1] or the wrapped block height.
+    """
+    size = tuple(size) if size else None
+    pad = int(np.ceil(stroke_width / 2)) if stroke_color else 0
+    if fontsize is None:
+        fontsize = _fit_fontsize(txt, font, size, method, interline, pad) if size and size[0] else 40
+    pil_font = get_font(font, int(fontsize))
+
+    if method == "caption" and size and size[0]:
+        lines = wrap_lines(txt, pil_font, size[0] - 2 * pad)
+    else:
+        lines = txt.split("\n")
+    block_w, block_h, line_h = _block_size(lines, pil_font, interline, pad)
+
+    canvas_w = size[0] if size and size[0] else block_w
+    canvas_h = size[1] if size and size[1] else block_h
+    h_align, v_align = GRAVITY.get(str(align).lower(), ("center", "center"))
+    top = {"top": 0, "center": (canvas_h - block_h) // 2, "bottom": canvas_h - block_h}[v_align] + pad
+
+    # Coverage masks: fill glyphs, and glyphs grown by the stroke (drawn underneath the fill)
+    fill_mask = Image.new("L", (canvas_w, canvas_h), 0)
+    stroke_mask = Image.new("L", (canvas_w, canvas_h), 0) if stroke_color else None
+    for i, line in enumerate(lines):
+        line_w = pil_font.getlength(line)
+        x = {"left": pad, "center": (canvas_w - line_w) / 2, "right": canvas_w - pad - line_w}[h_align]
+        y = top + i * (line_h + interline)
+        ImageDraw.Draw(fill_mask).text((x, y), line, font=pil_font, fill=255)
+        if stroke_mask is not None:
+            ImageDraw.Draw(stroke_mask).text((x, y), line, font=pil_font, fill=255,
+                                             stroke_width=pad, stroke_fill=255)
+
+    out = np.zeros((canvas_h, canvas_w, 4), dtype=np.float32)
+    out[:] = to_rgba(bg_color)
+    out[:, :, 3] /= 255.0
+    if stroke_mask is not None:
+        _over(out, to_rgba(stroke_color), np.asarray(stroke_mask, np.float32) / 255.0)
+    _over(out, to_rgba(color), np.asarray(fill_mask, np.float32) / 255.0)
+    out[:, :, 3] *= 255.0
+
+    rgba = np.clip(np.rint(out), 0, 255).astype(np.uint8)
+    rgba.setflags(write=False)
+    return rgba
+
+# --------------------------------------------------
+# DROP-IN TextClip
+# --------------------------------------------------
+class PillowTextClip(ImageClip):
+    """
+    Same call signature as moviepy's TextClip, rendered with Pillow instead of an
+    ImageMagick subprocess. Use as:  from text_render import PillowTextClip as TextClip
+    """
+
+    def __init__(self, txt=None, filename=None, size=None, color='black', bg_color='transparent',
+                 fontsize=None, font='Courier', stroke_color=None, stroke_width=1, method='label',
+                 kerning=None, align='center', interline=None, tempfilename=None, temptxt=None,
+                 transparent=True, remove_temp=True, print_cmd=False):
+        if txt is None:
+            with open(filename, encoding="utf-8") as f:
+                txt = f.read()
+        as_key = lambda c: tuple(c) if isinstance(c, list) else c
+        rgba = render_text(str(txt), fontsize=fontsize, color=as_key(color), font=font,
+                           size=tuple(size) if size else None, bg_color=as_key(bg_color),
+                           stroke_color=as_key(stroke_color), stroke_width=stroke_width,
+                           method=method, align=align, interline=interline or 0)
+        ImageClip.__init__(self, rgba, transparent=transparent)
+        self.txt = txt
+        self.color = color
+        self.stroke_color = stroke_color
@@ -0,0 +1,249 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_engines import ENGINES, WORDS_EXT
+
+# --------------------------------------------------
+# CONTENT-ADDRESSED TTS CACHE
+# --------------------------------------------------
+# Every pipeline asks for speech through tts(); identical (text, engine, voice, lang, rate)
+# is synthesized once and then served from disk. Re-runs, retries and the same item on
+# several channels become file lookups.
+#   set TTS_CACHE_DIR=D:\tts_cache      set TTS_CACHE_MAX_MB=2000
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache"))
+TTS_CACHE_MAX_MB = float(os.environ.get("TTS_CACHE_MAX_MB", "1000"))
+# How many segments synthesize_batch() sends to the engine at once
+TTS_CONCURRENCY = int(os.environ.get("TTS_CONCURRENCY", "4"))
+# Engine selection (see tts_engines.py). TTS_ENGINE forces one engine for every call, e.g.
+# on an air-gapped render node:  set TTS_ENGINE=local
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "")
+TTS_FALLBACK = [e for e in os.environ.get("TTS_FALLBACK", "local").split(",") if e]
+# A remote engine that failed is skipped (by every process sharing the cache) for this long
+TTS_RETRY_AFTER = float(os.environ.get("TTS_RETRY_AFTER", "300"))
+# An over-full cache is trimmed to this fraction of its limit, so the next trim (a directory
+# walk) only happens after that much new audio has been written
+EVICT_TO = 0.9
+
+def normalize_text(text):
+    """Whitespace-insensitive form of the text, so re-flowed JSON still hits."""
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+def cache_key(text, engine="gtts", voice="", lang="en", rate=""):
+    raw = "\x1f".join([normalize_text(text), engine, voice or "", lang or "", str(rate or "")])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+class TTSCache:
+    """Size-bounded LRU of synthesized audio files (recency = file mtime, touched on every hit)."""
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_mb=TTS_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._size = None  # running byte total, from one directory walk on the first write
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key, ext=".mp3"):
+        return os.path.join(self.cache_dir, key[:2], key + ext)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def lookup(self, text, engine="gtts", voice="", lang="en", rate="", ext=".mp3"):
+        """The cached file for this request (counted as a hit), or None."""
+        path = self.path_for(cache_key(text, engine, voice, lang, rate), ext)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            return path
+        return None
+
+    def get(self, text, synth, engine="gtts", voice="", lang="en", rate="", ext=".mp3"):
+        """Returns the cached file for this request, calling synth(text, path) only on a miss."""
+        key = cache_key(text, engine, voice, lang, rate)
+        path = self.path_for(key, ext)
+        # Same text requested from two threads: the second waits and then hits
+        with self._key_lock(key):
+            cached = self.lookup(text, engine, voice, lang, rate, ext)
+            if cached:
+                return cached
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part{ext}"
+            try:
+                synth(normalize_text(text), tmp)
+                if os.path.exists(tmp + WORDS_EXT):
+                    os.replace(tmp + WORDS_EXT, path + WORDS_EXT)
+                os.replace(tmp, path)  # readers never see a half-written file
+            finally:
+                for leftover in (tmp, tmp + WORDS_EXT):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            added = sum(os.path.getsize(p) for p in (path, path + WORDS_EXT) if os.path.exists(p))
+            with self._lock:
+                self.misses += 1
+        self.evict(added)
+        return path
+
+    def _files(self):
+        """[(mtime, size, path)] of every cached file (one walk of the cache directory)."""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if ".part" in name or name.startswith(".down_"):
+                    continue
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+        return files
+
+    def evict(self, added=0):
+        """
+        Counts `added` new bytes and, once the cache is over max_bytes, drops least-recently-used
+        files until it is back under EVICT_TO of it. The directory is only walked on the first
+        call and when the running total crosses the limit; that walk also picks up what other
+        processes sharing the cache have written since.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += added
+                if self._size <= self.max_bytes:
+                    return
+            files = self._files()
+            total = sum(f[1] for f in files)
+            if total > self.max_bytes:
+                for _, size, p in sorted(files):
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    try:
+                        os.remove(p)
+                        total -= size
+                    except OSError:
+                        pass
+            self._size = total
+
+    def mark_down(self, engine):
+        open(os.path.join(self.cache_dir, f".down_{engine}"), "w").close()
+
+    def is_down(self, engine):
+        marker = os.path.join(self.cache_dir, f".down_{engine}")
+        return os.path.exists(marker) and time.time() - os.path.getmtime(marker) < TTS_RETRY_AFTER
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(rate, 1)}
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTSCache()
+    return _cache
+
+# --------------------------------------------------
+# ONE CALL FOR ALL PIPELINES
+# --------------------------------------------------
+def _engine_chain(engine, voice, fallback):
+    """[(engine, voice), ...] in the order to try; `voice` only applies to the requested engine."""
+    primary = TTS_ENGINE or engine
+    chain = [(primary, voice if primary == engine else "")]
+    for name in (TTS_FALLBACK if fallback is None else fallback):
+        if name not in [c[0] for c in chain]:
+            chain.append((name, ""))
+    return chain
+
+def tts(text, out_path=None, lang="en", engine="gtts", voice="", rate="", fallback=None):
+    """
+    Speech for `text` as an audio file path (served from the cache when possible).
+    Pass `out_path` when a later stage expects the file at a fixed name (e.g. v_0.mp3);
+    the cached file is then copied there. Never delete the returned cache path.
+    If `engine` fails or times out, the `fallback` engines (default TTS_FALLBACK) are tried in order.
+    """
+    cache = get_cache()
+    chain = _engine_chain(engine, voice, fallback)
+    path, error = None, None
+    for i, (name, v) in enumerate(chain):
+        spec = ENGINES[name]
+        key = dict(engine=name, voice=v, lang=lang, rate=rate, ext=spec.ext)
+        # Recently failed remote engine: only its cache is used until TTS_RETRY_AFTER passes
+        if spec.remote and i < len(chain) - 1 and cache.is_down(name):
+            path = cache.lookup(text, **key)
+            if path:
+                break
+            continue
+        try:
+            path = cache.get(text, lambda t, p: spec.save(t, p, v, lang, rate), **key)
+            break
+        except Exception as e:
+            error = e
+            if spec.remote:
+                cache.mark_down(name)
+            if i < len(chain) - 1:
+                print(f"⚠️ TTS engine '{name}' failed ({e}); falling back to '{chain[i + 1][0]}'")
+    if path is None:
+        raise error or RuntimeError(f"no TTS engine available in {[c[0] for c in chain]}")
+    if out_path:
+        shutil.copyfile(path, out_path)
+        if os.path.exists(path + WORDS_EXT):
+            shutil.copyfile(path + WORDS_EXT, out_path + WORDS_EXT)
+        return out_path
+    return path
+
+def print_tts_stats():
+    s = get_cache().stats()
+    print(f"🗣️ TTS cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']}% hit rate)")
+
+# --------------------------------------------------
+# WHOLE-JOB BATCH (before rendering starts)
+# --------------------------------------------------
+Speech = namedtuple("Speech", ["path", "duration"])
+
+def audio_duration(path):
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    return ffmpeg_parse_infos(path)["duration"]
+
+def synthesize_batch(texts, max_workers=None, **tts_kwargs):
+    """
+    Synthesizes every text of a job concurrently (at most `max_workers` engine calls at a time)
+    and returns {text: Speech(path, duration)}. Results land in the cache, so the per-scene
+    tts() calls that follow are hits. Failed texts are left out and retried by those calls.
+    """
+    texts = [t for t in texts if t and normalize_text(t)]
+    # One engine call per distinct normalized text, however often it repeats in the job
+    unique = list(dict.fromkeys(normalize_text(t) for t in texts))
+
+    def one(text):
+        path = tts(text, **tts_kwargs)
+        return text, Speech(path, audio_duration(path))
+
+    ready = {}
+    with ThreadPoolExecutor(max_workers=max_workers or TTS_CONCURRENCY) as pool:
+        futures = [pool.submit(one, t) for t in unique]
+        for future in futures:
+            try:
+                text, result = future.result()
+                ready[text] = result
+            except Exception as e:
+                print(f"⚠️ TTS failed, will retry per scene: {e}")
+    total = sum(s.duration for s in ready.values())
+    print(f"🗣️ {len(ready)}/{len(unique)} voice segments ready ({total:.1f}s of audio)")
+    return {t: ready[normalize_text(t)] for t in texts if normalize_text(t) in ready}
@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import shutil
+import asyncio
+import threading
+import subprocess
+from collections import namedtuple
+
+# --------------------------------------------------
+# TTS ENGINES
+# --------------------------------------------------
+# Interchangeable speech backends behind tts_cache.tts(). Every engine is a
+#   save(text, path, voice, lang, rate)
+# function; `rate` is the edge_tts-style "+15%" string and is translated per engine.
+#   gtts   - Google TTS (network)
+#   edge   - Microsoft Edge neural voices (network)
+#   local  - offline: pyttsx3 (SAPI5 on Windows) if installed, else the espeak-ng binary
+# Remote engines give up after TTS_TIMEOUT seconds so the fallback can take over.
+#   set TTS_TIMEOUT=10
+TTS_TIMEOUT = float(os.environ.get("TTS_TIMEOUT", "20"))
+# Engines that report word boundaries write them next to the audio as <audio>.words.json
+WORDS_EXT = ".words.json"
+
+Engine = namedtuple("Engine", ["save", "ext", "remote"])
+
+def rate_percent(rate):
+    """'+15%' -> 0.15, '' -> 0.0"""
+    m = re.match(r"^\s*([+-]?\d+(?:\.\d+)?)\s*%\s*$", str(rate or ""))
+    return float(m.group(1)) / 100 if m else 0.0
+
+def _gtts_save(text, path, voice, lang, rate):
+    from gtts import gTTS
+    gTTS(text=text, lang=lang or "en", timeout=TTS_TIMEOUT).save(path)
+
+async def _edge_stream(communicate, path):
+    """Writes the audio and returns the WordBoundary events as [{word, start, end}] in seconds."""
+    words = []
+    with open(path, "wb") as f:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                f.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                start = chunk["offset"] / 1e7  # 100 ns ticks
+                words.append({"word": chunk["text"], "start": start, "end": start + chunk["duration"] / 1e7})
+    return words
+
+def _edge_save(text, path, voice, lang, rate):
+    from edge_tts import Communicate
+    args = (text, voice or "en-US-LiamNeural")
+    try:
+        communicate = Communicate(*args, rate=rate or "+0%", boundary="WordBoundary")
+    except TypeError:  # edge-tts < 7 always reports word boundaries
+        communicate = Communicate(*args, rate=rate or "+0%")
+    words = asyncio.run(asyncio.wait_for(_edge_stream(communicate, path), TTS_TIMEOUT))
+    if words:
+        with open(path + WORDS_EXT, "w", encoding="utf-8") as f:
+            json.dump(words, f)
+
+# pyttsx3 drives one OS speech engine per process and is not thread-safe
+_pyttsx3_lock = threading.Lock()
+
+def _pyttsx3_save(text, path, voice, lang, rate):
+    import pyttsx3
+    with _pyttsx3_lock:
+        engine = pyttsx3.init()
+        engine.setProperty("rate", int(200 * (1 + rate_percent(rate))))
+        if voice:
+            engine.setProperty("voice", voice)
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        engine.stop()
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        raise IOError("pyttsx3 produced no audio")
+
+def _espeak_save(text, path, voice, lang, rate):
+    binary = shutil.which("espeak-ng") or shutil.which("espeak")
+    if not binary:
+        raise FileNotFoundError("espeak-ng not found on PATH")
+    wpm = int(175 * (1 + rate_percent(rate)))
+    subprocess.run([binary, "-v", voice or lang or "en", "-s", str(wpm), "-w", path, text],
+                   check=True, capture_output=True)
+
+def _local_save(text, path, voice, lang, rate):
+    try:
+        import pyttsx3  # noqa: F401
+    except ImportError:
+        return _espeak_save(text, path, voice, lang, rate)
+    return _pyttsx3_save(text, path, voice, lang, rate)
+
+ENGINES = {
+    "gtts": Engine(_gtts_save, ".mp3", True),
+    "edge": Engine(_edge_save, ".mp3", True),
+    "local": Engine(_local_save, ".wav", False),
+    "pyttsx3": Engine(_pyttsx3_save, ".wav", False),
+    "espeak": Engine(_espeak_save, ".wav", False),
+}
+
+# --------------------------------------------------
+# PER-CHANNEL SELECTION
+# --------------------------------------------------
+def tts_settings(audio_cfg, channel=None):
+    """
+    tts() keyword arguments for a channel, read from a config's "audio" section:
+      "tts_lang": "en",
+      "tts_map": {"Default": {"engine": "gtts"},
+                  "SpaceMindAI": {"engine": "edge", "voice": "en-GB-RyanNeural", "rate": "+10%",
+                                  "fallback": ["gtts", "local"]}}
+    Channels without an entry use "Default"; missing keys use tts()'s defaults.
+    """
+    tts_map = audio_cfg.get("tts_map", {})
+    settings = {"lang": audio_cfg.get("tts_lang", "en")}
+    settings.update(tts_map.get("Default", {}))
+    settings.update(tts_map.get(channel, {}))
+    return settings
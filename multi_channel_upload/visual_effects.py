@@ -1,6 +1,8 @@
 import numpy as np
 from moviepy.editor import *
+from text_render import PillowTextClip as TextClip
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from progress_bar import ProgressBar
 
 # --------------------------------------------------
 # ROUNDED BOX GENERATOR
@@ -39,8 +41,7 @@ def get_styled_header(text, dur, W):
 # --------------------------------------------------
 # STYLED TICKER
 # --------------------------------------------------
-def get_styled_ticker(text, dur, W):
-    box_h = 120
+def get_styled_ticker(text, dur, W, box_h=120):
     box_w = W - 40
     bg = create_rounded_box(box_w, box_h, (130, 0, 0), opacity=255).set_duration(dur)
     txt = TextClip(text, fontsize=32, color='white', font='Arial-Bold', method='label').set_duration(dur)
@@ -54,10 +55,6 @@ def get_styled_ticker(text, dur, W):
 # PROGRESS BAR
 # --------------------------------------------------
 def get_progress_bar(dur, W, H):
+    """Yellow bar along the bottom edge; use .attach(scene) to draw it into every frame."""
     bar_h = 14
-    def make_frame(t):
-        prog_w = max(1, int((t / dur) * W))
-        img = np.zeros((bar_h, W, 3), dtype="uint8")
-        img[:, :prog_w] = [255, 215, 0] 
-        return img
-    return VideoClip(make_frame, duration=dur).set_position(('center', H - bar_h))
\ No newline at end of file
+    return ProgressBar(dur, W, y=H - bar_h, bar_h=bar_h, color=(255, 215, 0))
\ No newline at end of file
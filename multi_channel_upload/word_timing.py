@@ -0,0 +1,125 @@
+import os
+import re
+import json
+import numpy as np
+
+from render_backend import AUDIO_FPS
+from audio_assets import get_pcm_cache, pcm_samples, file_digest
+from tts_cache import normalize_text
+from tts_engines import WORDS_EXT
+
+# --------------------------------------------------
+# WORD TIMINGS FOR SUBTITLES
+# --------------------------------------------------
+# When and for how long each word is spoken in a voice file, so subtitle layers follow the
+# voice instead of splitting the duration evenly or by character count.
+#   - edge_tts voices: the engine's own WordBoundary events (<audio>.words.json, see tts_engines)
+#   - every other engine: aligned offline against the waveform (below), cached per audio + text
+# Timings are computed once per voice file; re-rendering a video reads the cached JSON.
+FRAME = 0.01        # seconds per energy frame
+VOICED_LEVEL = 0.15 # share of the (noise floor -> loud speech) range that counts as voiced
+MIN_PAUSE = 0.12    # silence this long is a pause, not a gap between syllables
+SNAP = 0.4          # a boundary after punctuation moves to a pause within this much speech
+
+def _norm(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+def _weight(word):
+    """Rough spoken length of a word: letters, digits read out as several syllables, plus onset."""
+    w = _norm(word)
+    return 1 + sum(3 if c.isdigit() else 1 for c in w)
+
+def align_words(samples, words, fps=AUDIO_FPS):
+    """
+    Energy-based forced alignment: finds the voiced frames of the waveform and lays the words
+    over them in order, each taking a share proportional to its length. Silence never counts
+    towards a word, and words ending in punctuation end at the pause that follows them.
+    """
+    hop = max(1, int(FRAME * fps))
+    n = len(samples) // hop
+    total = len(samples) / fps
+    if not words:
+        return []
+    if n == 0:
+        return [{"word": w, "start": 0.0, "end": total} for w in words]
+
+    frames = np.asarray(samples[:n * hop], dtype=np.float32).reshape(n, hop, -1)
+    energy = np.sqrt((frames ** 2).mean(axis=(1, 2)))
+    floor, loud = np.percentile(energy, 10), np.percentile(energy, 95)
+    voiced = energy > floor + VOICED_LEVEL * (loud - floor)
+    if not voiced.any():
+        voiced[:] = True
+
+    first = int(np.argmax(voiced))
+    last = n - 1 - int(np.argmax(voiced[::-1]))
+    spoken = np.cumsum(voiced[first:last + 1])  # voiced frames up to and including each frame
+    weights = np.array([_weight(w) for w in words], dtype=np.float64)
+    edges = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum() * spoken[-1]
+
+    # Sentences and clauses end in a pause: snap those boundaries onto the nearest one
+    unvoiced = np.concatenate([[False], ~voiced[first:last + 1], [False]]).astype(np.int8)
+    run_starts = np.flatnonzero(np.diff(unvoiced) == 1)
+    run_ends = np.flatnonzero(np.diff(unvoiced) == -1)
+    pauses = spoken[run_starts[(run_ends - run_starts) * FRAME >= MIN_PAUSE] - 1]
+    if len(pauses):
+        for i in range(1, len(words)):
+            if words[i - 1][-1:] in ".,!?;:":
+                near = pauses[np.argmin(np.abs(pauses - edges[i]))]
+                if abs(near - edges[i]) * FRAME <= SNAP and edges[i - 1] < near < edges[i + 1]:
+                    edges[i] = near
+
+    timings = []
+    for i, word in enumerate(words):
+        start = first + int(np.searchsorted(spoken, edges[i], side="right"))
+        end = first + int(np.searchsorted(spoken, edges[i + 1], side="left")) + 1
+        timings.append({"word": word, "start": round(start * FRAME, 3),
+                        "end": round(min(max(end, start + 1) * FRAME, total), 3)})
+    return timings
+
+def word_timings(audio_path, text, tempo=1.0):
+    """
+    [{"word", "start", "end"}] for `text` as spoken in `audio_path` (seconds). Pass the same
+    `tempo` the voice is loaded with (load_audio(..., tempo=...)) to get times on that timeline.
+    """
+    sidecar = audio_path + WORDS_EXT
+    if os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            words = json.load(f)
+        return [{"word": w["word"], "start": w["start"] / tempo, "end": w["end"] / tempo} for w in words]
+
+    def synth(_, tmp):
+        samples = pcm_samples(audio_path, tempo=tempo)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(align_words(samples, normalize_text(text).split()), f)
+
+    key = f"{file_digest(audio_path)} {normalize_text(text)}"
+    path = get_pcm_cache().get(key, synth, engine="words", voice="", lang="", rate=f"{tempo:.6g}", ext=".json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def phrase_timings(words, phrases, total):
+    """
+    (start, end) for each phrase of the spoken text, found in order in the word timings.
+    The spans tile 0..total: a phrase stays on screen until the next one starts.
+    """
+    starts, cursor = [], 0
+    tokens = [_norm(w["word"]) for w in words]
+    for phrase in phrases:
+        wanted = [t for t in (_norm(w) for w in phrase.split()) if t]
+        found = None
+        for i in range(cursor, len(tokens)):
+            if wanted and tokens[i:i + len(wanted[:2])] == wanted[:2]:
+                found = i
+                break
+        if found is None:
+            found = min(cursor, len(words) - 1)
+        starts.append(words[found]["start"] if words else 0.0)
+        cursor = found + len(wanted)
+
+    # Monotonic, first phrase from 0, last one until the end
+    spans = []
+    for i, start in enumerate(starts):
+        start = 0.0 if i == 0 else max(start, spans[-1][0])
+        end = total if i == len(starts) - 1 else max(start, starts[i + 1])
+        spans.append((start, min(end, total)))
+    return [(s, max(e, s)) for s, e in spans]
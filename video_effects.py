@@ -1,11 +1,15 @@
-import os, json, shutil, time
+import os, sys, json, time
 from datetime import datetime
 from gtts import gTTS
 from moviepy.editor import *
 from moviepy.config import change_settings
 from PIL import Image
-from icrawler.builtin import BingImageCrawler
-import moviepy.video.fx.all as vfx
+
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "multi_channel_upload"))
+from ken_burns import ken_burns
+from image_cache import fetch_images
+from image_ingest import render_ready
 
 # --- CONFIGURATION ---
 IMAGEMAGICK_PATH = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
@@ -15,9 +19,10 @@ W, H = 720, 1280
 
 # --- INTERNAL LOGIC (Replacing video_effects.py) ---
 
-def apply_ken_burns_internal(clip, zoom_ratio=0.04):
-    """Adds a smooth zoom-in effect to an image clip."""
-    return clip.fx(vfx.resize, lambda t: 1.0 + (zoom_ratio * t))
+def apply_ken_burns_internal(image_path, duration, zoom_ratio=0.04):
+    """Adds a smooth zoom-in effect to one image (pre-scaled once, cropped per frame)."""
+    zoom = 1.0 + zoom_ratio * duration
+    return ken_burns(render_ready(image_path, (None, H), zoom=zoom), duration, size=(None, H), zoom=(1.0, zoom))
 
 def create_sentence_scrolling_internal(full_text, duration):
     """Creates a news bar with scrolling subtitles."""
@@ -43,20 +48,13 @@ def create_sentence_scrolling_internal(full_text, duration):
 
 def fetch_and_fix_images(query, index):
     """Downloads images and ensures they are RGB to prevent render crashes."""
-    save_dir = f"downloads_{index}"
-    if os.path.exists(save_dir): shutil.rmtree(save_dir)
-    os.makedirs(save_dir)
-    
-    crawler = BingImageCrawler(storage={'root_dir': save_dir}, log_level=50)
-    crawler.crawl(keyword=f"{query} cricket stadium action", max_num=3)
-    
+    # Cached crawl is shared and never edited; RGB conversion happens once, at slide size,
+    # in render_ready() (apply_ken_burns_internal)
     valid_paths = []
-    for f in os.listdir(save_dir):
-        p = os.path.join(save_dir, f)
+    for src in fetch_images(f"{query} cricket stadium action", max_num=3):
         try:
-            with Image.open(p) as img:
-                img.convert('RGB').save(p) # Force RGB
-                valid_paths.append(p)
+            with Image.open(src):
+                valid_paths.append(src)
         except: continue
     return valid_paths
 
@@ -85,12 +83,11 @@ def generate_video_and_upload(json_file):
         images = fetch_and_fix_images(search_key, i)
         
         if images:
-            img_clips = [ImageClip(p).set_duration(dur/len(images)).resize(height=H) for p in images]
+            # Zoom each slide on its own instead of resizing the whole concatenated background
+            img_clips = [apply_ken_burns_internal(p, dur/len(images)) for p in images]
             bg = concatenate_videoclips(img_clips, method="chain")
         else:
             bg = ColorClip(size=(W, H), color=(20, 20, 40)).set_duration(dur)
-        
-        bg = apply_ken_burns_internal(bg)
 
         # 3. Header (Hook)
         hook = TextClip(item['hook_text'].upper(), fontsize=75, color='yellow', font='Arial-Bold',
@@ -1,12 +1,12 @@
 import os, json, sys, numpy as np
 from PIL import Image, ImageOps, ImageDraw
-from moviepy.config import change_settings
-from moviepy.editor import (ImageClip, TextClip, CompositeVideoClip, 
+from moviepy.editor import (ImageClip, CompositeVideoClip, 
                             concatenate_videoclips, AudioFileClip, 
                             vfx)
 
-# 1. ImageMagick Path (Update if necessary)
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"})
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "multi_channel_upload"))
+from text_render import PillowTextClip as TextClip
 
 VIDEO_SIZE = (1080, 1920)
 
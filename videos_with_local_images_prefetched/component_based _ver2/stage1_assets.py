@@ -1,6 +1,25 @@
 import os, json, re, sys, shutil
-from gtts import gTTS
-from icrawler.builtin import BingImageCrawler
+
+# Shared TTS and image caches live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "multi_channel_upload"))
+from tts_cache import tts, synthesize_batch
+from image_cache import fetch_images, prefetch_images
+
+# Narration engine (gtts / edge / local, see tts_engines.py); falls back to offline TTS on timeout
+TTS_SETTINGS = {"engine": "gtts", "lang": "en"}
+
+def scene_text(scene):
+    # Handles both 'content' and 'text'; [stage directions] are not spoken
+    raw_text = scene.get("content") or scene.get("text") or "No content available"
+    return re.sub(r"\[.*?\]", "", raw_text)
+
+def image_searches(scene):
+    # Split-screen keys ("Star A | Star B") get one image per star, others 3 of the scene
+    query_input = scene.get('search_key', "")
+    if "|" in query_input:
+        return [(q.strip(), 1) for q in query_input.split("|")[:2]]
+    query = query_input if query_input else f"{scene.get('star_name', 'News')} 2026 hd"
+    return [(query, 3)]
 
 def prepare_assets(json_file):
     if not os.path.exists(json_file):
@@ -17,34 +36,29 @@ def prepare_assets(json_file):
     # Use 'scenes' or 'news' key
     scenes = data.get("scenes") or data.get("news") or []
 
+    # All scene voices are synthesized concurrently up front; the per-scene copies below are cache hits
+    print(f"🎙️ Generating Audio for {len(scenes)} scenes...")
+    synthesize_batch([scene_text(scene) for scene in scenes], **TTS_SETTINGS)
+
+    # Every image search of the job (both stars of split-screen scenes) crawled concurrently
+    print(f"🔍 Crawling images for {len(scenes)} scenes...")
+    prefetch_images([search for scene in scenes for search in image_searches(scene)])
+
     for i, scene in enumerate(scenes):
         img_dir = f"media_bank/scene_{i}"
         os.makedirs(img_dir, exist_ok=True)
 
-        query_input = scene.get('search_key', "")
-        
-        # Split-Screen Detection logic
-        if "|" in query_input:
-            sub_queries = [q.strip() for q in query_input.split("|")]
+        # Split-Screen Detection logic (images come from the cache filled above)
+        searches = image_searches(scene)
+        if len(searches) > 1:
             print(f"🌓 Split-Screen detected for Scene {i}")
-            for j, sub_q in enumerate(sub_queries[:2]): 
-                print(f"   🔍 Crawling Star {j+1}: {sub_q}")
-                crawler = BingImageCrawler(storage={'root_dir': img_dir})
-                crawler.crawl(keyword=sub_q, max_num=1)
-        else:
-            query = query_input if query_input else f"{scene.get('star_name', 'News')} 2026 hd"
-            print(f"🔍 Crawling Scene {i}: {query}")
-            crawler = BingImageCrawler(storage={'root_dir': img_dir})
-            crawler.crawl(keyword=query, max_num=3)
-        
-        # FIXED: Audio Generation (Handles both 'content' and 'text')
-        raw_text = scene.get("content") or scene.get("text") or "No content available"
-        text_clean = re.sub(r"\[.*?\]", "", raw_text)
+        for j, (query, count) in enumerate(searches):
+            for k, src in enumerate(fetch_images(query, max_num=count)):
+                # Star-prefixed names: the second star no longer overwrites the first
+                shutil.copy(src, os.path.join(img_dir, f"{j}_{k:03d}{os.path.splitext(src)[1]}"))
         
-        print(f"🎙️ Generating Audio for Scene {i}...")
         try:
-            tts = gTTS(text=text_clean, lang='en')
-            tts.save(f"v_{i}.mp3")
+            tts(scene_text(scene), out_path=f"v_{i}.mp3", **TTS_SETTINGS)
         except Exception as e:
             print(f"⚠️ Audio Error: {e}")
 
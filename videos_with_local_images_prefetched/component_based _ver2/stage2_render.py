@@ -1,14 +1,17 @@
 import os, json, sys, numpy as np
 from PIL import Image, ImageOps, ImageDraw
-from moviepy.config import change_settings
-from moviepy.editor import (ImageClip, TextClip, CompositeVideoClip, 
-                            concatenate_videoclips, AudioFileClip, 
-                            vfx)
+from moviepy.editor import (ImageClip, CompositeVideoClip, 
+                            concatenate_videoclips)
 
-# 1. ImageMagick Path (Update if necessary)
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"})
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "multi_channel_upload"))
+from render_profiler import RenderProfiler, label
+from audio_assets import load_audio
+from text_render import PillowTextClip as TextClip
 
 VIDEO_SIZE = (1080, 1920)
+VOICE_TEMPO = 1.1   # voice read faster than its scene
+FINAL_SPEED = 1.15  # whole video; applied at the audio source, the visuals are built at final length
 
 def get_horizontal_frame_with_divider(img_paths):
     """Creates a side-by-side frame with a white divider and shadow."""
@@ -37,13 +40,19 @@ def render_video(json_file):
         data = json.load(f)
     
     scenes = data.get("scenes", [])
+    # CRITICAL: Filename must match what Stage 3 expects
+    output_name = f"{data.get('id')}.mp4"
+    profiler = RenderProfiler(output_name)
     clips = []
     sub_bar = TextClip("Please subscribe Trendwave Now", font="Arial-Bold", fontsize=45, 
                        color="white", bg_color="red", size=(1080, 80)).set_position(("center", 1800))
 
     for i, scene in enumerate(scenes):
         audio_path = f"v_{i}.mp3"
-        duration = AudioFileClip(audio_path).duration + 0.5 if os.path.exists(audio_path) else 5.0
+        # Pitch-preserving stretch, cached with the decoded voice
+        voice = load_audio(audio_path, tempo=VOICE_TEMPO * FINAL_SPEED) if os.path.exists(audio_path) else None
+        # Same timeline as the old speedx chain: (spoken length + 0.5s) / FINAL_SPEED
+        duration = (voice.duration * VOICE_TEMPO + 0.5 / FINAL_SPEED) if voice else 5.0 / FINAL_SPEED
         
         # Background with split-screen
         img_folder = f"media_bank/scene_{i}"
@@ -54,18 +63,16 @@ def render_video(json_file):
         txt_clip = TextClip(scene.get("content", ""), font="Arial-Bold", fontsize=50, color="yellow", 
                             bg_color="black", method='caption', size=(950, None)).set_duration(duration).set_position(('center', 1300))
         
-        scene_comp = CompositeVideoClip([bg, txt_clip, sub_bar.set_duration(duration)])
-        if os.path.exists(audio_path):
-            scene_comp = scene_comp.set_audio(AudioFileClip(audio_path).fx(vfx.speedx, 1.1))
+        label("background", bg); label("subtitles", txt_clip)
+        scene_comp = profiler.track(CompositeVideoClip([bg, txt_clip, label("subscribe_bar", sub_bar.set_duration(duration))]), i + 1)
+        if voice:
+            scene_comp = scene_comp.set_audio(voice)
         
         clips.append(scene_comp)
 
-    # FINAL SPEED BOOST (1.15x)
-    final_video = concatenate_videoclips(clips, method="compose").resize(newsize=VIDEO_SIZE).fx(vfx.speedx, 1.15)
+    final_video = concatenate_videoclips(clips, method="compose").resize(newsize=VIDEO_SIZE)
     
-    # CRITICAL: Filename must match what Stage 3 expects
-    output_name = f"{data.get('id')}.mp4" 
-    final_video.write_videofile(output_name, fps=24, codec="libx264")
+    profiler.write(final_video, output_name, fps=24, codec="libx264")
     return output_name
 
 if __name__ == "__main__":
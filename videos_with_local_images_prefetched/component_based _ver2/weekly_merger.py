@@ -1,9 +1,14 @@
 import os
+import sys
 import datetime
 import numpy as np
 from PIL import Image, ImageFilter
 from moviepy.editor import VideoFileClip, concatenate_videoclips, CompositeVideoClip, vfx
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "multi_channel_upload"))
+from render_backend import write_video
+
 def blur_frame(image):
     """ Blurs a frame using PIL (Pillow) """
     # Convert numpy array to PIL Image
@@ -52,8 +57,8 @@ def create_roundup():
         output_name = f"Weekly_Roundup_{datetime.datetime.now().strftime('%b_%d')}.mp4"
         final = concatenate_videoclips(processed_clips, method="compose")
         
-        # Write the final long-form video
-        final.write_videofile(output_name, fps=24, codec="libx264", audio_codec="aac")
+        # Write the final long-form video (RENDER_WORKERS=N splits it across N processes)
+        write_video(final, output_name, fps=24, codec="libx264", audio_codec="aac")
         
         # Keep archive for now to be safe, or uncomment to auto-delete:
         # for f in files: os.remove(f)
@@ -20,6 +20,10 @@ from moviepy.editor import (
 )
 import moviepy.video.fx.all as vfx
 
+# Shared render helpers live in multi_channel_upload/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "multi_channel_upload"))
+from render_backend import render_for_review
+
 VIDEO_SIZE = (1080, 1920)
 
 # --- 1. SCROLLING TICKER LOGIC ---
@@ -194,18 +198,10 @@ def generate_video(json_file):
         bg_audio = AudioFileClip(bg_music_file).volumex(0.12).set_duration(final_video.duration)
         final_video = final_video.set_audio(CompositeAudioClip([final_video.audio, bg_audio]))
 
-    final_video.write_videofile(output_filename, fps=24, codec="libx264")
-    
-    # Auto-Preview
-    os.startfile(output_filename)
-
-    print("\n" + "="*40)
-    print(f"✅ VIDEO READY: {output_filename}")
-    print("="*40)
-    
-    # Upload Confirmation
-    choice = input("🚀 Proceed with UPLOAD to YouTube? (y/n): ").lower().strip()
-    if choice == 'y':
+    # Auto-Preview + Upload Confirmation (REVIEW_DRAFT=1 previews a quick draft first)
+    approved = render_for_review(final_video, output_filename, "🚀 Proceed with UPLOAD to YouTube? (y/n): ",
+                                 on_ready=os.startfile, fps=24, codec="libx264")
+    if approved:
         trigger_youtube_upload(output_filename, meta)
     else:
         print("📁 Upload cancelled. Video saved locally.")